@@ -1,16 +1,222 @@
 from rasa_sdk import Action, Tracker
 from rasa_sdk.executor import CollectingDispatcher
 from rasa_sdk.forms import FormValidationAction
-from rasa_sdk.events import SlotSet
-from typing import Any, Dict, List, Text
+from rasa_sdk.events import FollowupAction, SlotSet
+from typing import Any, Awaitable, Dict, List, Optional, Text, Tuple, TypeVar
+import asyncio
+import os
 import re
-import requests
 import logging
-
-# Setup logging for debugging
-logging.basicConfig(level=logging.DEBUG, format="%(asctime)s - %(levelname)s - %(message)s")
+import time
+
+from actions.auth import AuthenticationError, token_manager
+from actions.call_history import CallHistory, CallHistoryCache
+from actions.cls_client import CircuitOpenError, ClsConnectionError, cls_client
+from actions.customer_directory import CustomerDirectory, CustomerRecord
+from actions.log import configure_logging, fields, log_slots
+from actions.metrics import (
+    ACTION_STAGE_LATENCY,
+    AUTHENTICATIONS,
+    REGISTRY,
+    UPSTREAM_CIRCUIT_OPEN,
+    UPSTREAM_COALESCED,
+    record_cache_stats,
+)
+from actions.packages import catalogue
+from actions.shared_cache import shared_cache
+from actions.slots import (
+    CallHistorySlots,
+    ConversationSlots,
+    CreditSlots,
+    PackageSlots,
+    PhoneFormSlots,
+    read_slots,
+)
+from actions.templates import templates
+from actions.tracing import configure_tracing, span
+
+configure_logging()
+configure_tracing("action_server")
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+class CustomerFetchError(Exception):
+    def __init__(self, status_code: int) -> None:
+        super().__init__(f"getAllCustomers returned status {status_code}")
+        self.status_code = status_code
+
+
+async def fetch_all_customers() -> List[Dict[Text, Any]]:
+    response = await token_manager.call(cls_client.get_all_customers)
+    logger.debug("Customers API responded", extra=fields(status=response.status))
+    if response.status != 200:
+        raise CustomerFetchError(response.status)
+    return response.json()
+
+
+async def load_customers() -> List[Dict[Text, Any]]:
+    """Customer list for the directory, shared between action server workers.
+
+    A copy published by another worker is used if it is younger than the miss
+    refresh interval, so it is never older than what a miss would reload.
+    """
+    customers = await shared_cache.get("customers")
+    if customers is None:
+        customers = await shared_cache.fill(
+            "customers", fetch_all_customers, ttl=customer_directory.miss_refresh_interval
+        )
+    return customers
+
+
+# Shared by every action in this process so a turn never has to download and scan
+# the whole customer list itself.
+customer_directory = CustomerDirectory(
+    load_customers,
+    ttl=float(os.environ.get("CUSTOMER_DIRECTORY_TTL", "300")),
+    miss_refresh_interval=float(os.environ.get("CUSTOMER_DIRECTORY_MISS_REFRESH", "30")),
+    max_entries=int(os.environ.get("CUSTOMER_DIRECTORY_MAX_ENTRIES", "200000")),
+    overflow_entries=int(os.environ.get("CUSTOMER_DIRECTORY_OVERFLOW_ENTRIES", "10000")),
+)
+
+# Phone numbers the CLS customer list uses.
+PHONE_NUMBER_FORMAT = re.compile(r"^\d{10,12}$")
+
+# Number of recent calls shown to the user; only this many are read from the API.
+CALL_HISTORY_LIMIT = 5
+# Upper bound on how long action_show_call_history waits for its backend calls.
+CALL_HISTORY_TIMEOUT = float(os.environ.get("CALL_HISTORY_TIMEOUT", "15"))
+
+call_history_cache = CallHistoryCache(
+    max_entries=int(os.environ.get("CALL_HISTORY_CACHE_SIZE", "1000")),
+    ttl=float(os.environ.get("CALL_HISTORY_CACHE_TTL", "60")),
+)
+
+
+class CallHistoryFetchError(Exception):
+    def __init__(self, status_code: int) -> None:
+        super().__init__(f"getRecentCallsByCustomerId returned status {status_code}")
+        self.status_code = status_code
+
+
+class CustomerMismatchError(Exception):
+    """The phone number is unknown or belongs to a different customer_id."""
+
+
+async def verify_customer(phone_number: Text, customer_id: Any) -> CustomerRecord:
+    customer = await customer_directory.lookup_phone(phone_number)
+    if not customer or customer.id != customer_id:
+        raise CustomerMismatchError()
+    return customer
+
+
+async def load_call_history(customer_id: Any) -> Tuple[CallHistory, bool]:
+    """Return the customer's call history and whether it came from a cache."""
+    history = await cached_call_history(customer_id)
+    if history is not None:
+        logger.debug("Call history served from cache", extra=fields(customer_id=customer_id))
+        return history, True
+
+    response = await token_manager.call(
+        lambda auth_token: cls_client.get_recent_calls(auth_token, customer_id, limit=CALL_HISTORY_LIMIT)
+    )
+    logger.debug("Call history API responded", extra=fields(status=response.status))
+    if response.status not in (200, 417):
+        raise CallHistoryFetchError(response.status)
+    calls = (response.json() or []) if response.status == 200 else []
+    return CallHistory(response.status, calls), False
+
+
+async def timed_stage(timings: Dict[Text, float], action: Text, stage: Text, awaitable: Awaitable[T]) -> T:
+    started = time.perf_counter()
+    try:
+        with span(f"stage:{stage}"):
+            return await awaitable
+    finally:
+        timings[stage] = time.perf_counter() - started
+        ACTION_STAGE_LATENCY.observe(timings[stage], action=action, stage=stage)
+
+
+def _stage_error(task: "asyncio.Future[Any]") -> Optional[BaseException]:
+    if not task.done() or task.cancelled():
+        return None
+    return task.exception()
+
+
+async def cached_call_history(customer_id: Any) -> Optional[CallHistory]:
+    """Call history from this worker's cache, else from the shared cache."""
+    history = call_history_cache.get(customer_id)
+    if history is None:
+        shared = await shared_cache.get(f"call_history:{customer_id}")
+        if shared is not None:
+            history = CallHistory(*shared)
+            call_history_cache.put(customer_id, history)
+    return history
+
+
+async def store_call_history(customer_id: Any, history: CallHistory) -> None:
+    call_history_cache.put(customer_id, history)
+    await shared_cache.set(f"call_history:{customer_id}", history, ttl=call_history_cache.ttl)
+
+
+def collect_metrics() -> None:
+    record_cache_stats("customer_directory", customer_directory.stats())
+    record_cache_stats("call_history", call_history_cache.stats())
+    if shared_cache.enabled:
+        record_cache_stats("shared", shared_cache.stats())
+    for endpoint, stats in cls_client.flights.stats().items():
+        UPSTREAM_COALESCED.set(stats["deduplicated"], endpoint=endpoint)
+    AUTHENTICATIONS.set(token_manager.authentications)
+    UPSTREAM_CIRCUIT_OPEN.set(1.0 if cls_client.breaker.is_open else 0.0)
+
+
+REGISTRY.add_collector(collect_metrics)
+
+
+async def warm_up() -> Dict[Text, Any]:
+    """Authenticate and load the customer directory before the first turn needs them.
+
+    Returns a report per step; a failed step is logged and leaves that cache
+    to be filled on demand, as without warm-up.
+    """
+    report: Dict[Text, Any] = {}
+    steps = [("cls_token", token_manager.get_token), ("customer_directory", customer_directory.refresh)]
+    for step, run in steps:
+        started = time.perf_counter()
+        try:
+            await run()
+            report[step] = {"ok": True}
+        except Exception as e:
+            logger.warning("Warm-up step %s failed: %s", step, e)
+            report[step] = {"ok": False, "error": str(e)}
+        report[step]["ms"] = round((time.perf_counter() - started) * 1000, 1)
+    report["customers"] = len(customer_directory)
+    return report
+
+
+def credit_reply(credit: Any, name: Any = None) -> Tuple[Text, Optional[Text]]:
+    """The credit balance reply and the `current_question` it leads to (None if unknown)."""
+    if credit is None:
+        return templates.render("utter_credit_unavailable", name=name), None
+    if credit == 0.0:
+        return templates.render("utter_credit_zero", name=name), "show_call_history"
+    return templates.render("utter_credit_balance", name=name, credit=f"{credit:.2f}"), "still_unable"
+
+
+def call_history_reply(history: CallHistory, name: Any = None) -> Text:
+    if history.status == 417:
+        return templates.render("utter_no_call_history", name=name)
+    if not history.calls:
+        return templates.render("utter_no_calls_for_customer", name=name)
+    lines = templates.render_lines("utter_call_history_line", history.calls[:CALL_HISTORY_LIMIT])
+    return templates.render("utter_call_history", name=name, calls=lines)
+
+
+def backend_unavailable(dispatcher: CollectingDispatcher, name: Any) -> List[Dict[Text, Any]]:
+    """Degraded mode: tell the user and hand over to a representative straight away."""
+    dispatcher.utter_message(text=templates.render("utter_backend_unavailable", name=name))
+    return [FollowupAction("action_connect_to_representative")]
+
 
 # --- Begin: Comment out ValidateAuthForm and related authentication code ---
 # class ValidateAuthForm(FormValidationAction):
@@ -108,12 +314,6 @@ class ValidatePhoneNumberForm(FormValidationAction):
     def name(self) -> Text:
         return "validate_phone_number_form"
 
-    def find_credit_by_phone(self, customers, phone_number):
-        for customer in customers:
-            if customer.get("phone") == phone_number:
-                return customer.get("creditLimit"), customer.get("phone"), customer.get("id")
-        return None, None, None
-
     async def validate_phone_number(
         self,
         slot_value: Any,
@@ -122,88 +322,76 @@ class ValidatePhoneNumberForm(FormValidationAction):
         domain: Dict[Text, Any]
     ) -> Dict[Text, Any]:
         phone_number = slot_value
-        username = "mminds"
-        password = "mm123"
-        logger.debug(f"[ValidatePhoneNumberForm] Validating phone_number: {phone_number}")
-        print(f"[DEBUG] ValidatePhoneNumberForm - Validating phone_number: {phone_number}")
-        print(f"[DEBUG] ValidatePhoneNumberForm - All slots: {tracker.current_slot_values()}")
+        username = token_manager.username
+        logger.debug("[ValidatePhoneNumberForm] Validating phone_number", extra=fields(phone_number=phone_number))
+        log_slots(logger, "ValidatePhoneNumberForm", read_slots(tracker, PhoneFormSlots))
         # dispatcher.utter_message(text="Checking....")
         # Validate phone number format
-        if not phone_number or not re.match(r"^\d{10,12}$", phone_number):
-            logger.debug(f"Invalid phone number format: {phone_number}")
-            print(f"[DEBUG] ValidatePhoneNumberForm - Invalid phone number format: {phone_number}")
-            dispatcher.utter_message(text="Please re-type your number in the correct format (10-12 digits).")
-            print(f"[DEBUG] ValidatePhoneNumberForm - Clearing slot: phone_number=None")
+        if not phone_number or not PHONE_NUMBER_FORMAT.match(phone_number):
+            logger.debug("[ValidatePhoneNumberForm] Invalid phone number format", extra=fields(phone_number=phone_number))
+            dispatcher.utter_message(text=templates.render("utter_phone_format_invalid"))
             return {"phone_number": None}
 
-        # Generate auth_token using the authentication API
+        # Get auth_token from the shared token cache (authenticates only when needed)
         try:
-            response = requests.post(
-                f"http://192.168.4.175:8443/cls_api/auth/authenticate?username={username}&password={password}"
-            )
-            print(f"[DEBUG] ValidatePhoneNumberForm - Auth API status: {response.status_code}")
-            if response.status_code == 200 and response.json().get("token"):
-                auth_token = response.json()["token"]
-                logger.debug(f"Authentication successful for username: {username}, token: {auth_token}")
-                print(f"[DEBUG] ValidatePhoneNumberForm - Authentication successful: username={username}, token={auth_token}")
-            else:
-                logger.error(f"Authentication failed for username: {username}, status: {response.status_code}")
-                print(f"[DEBUG] ValidatePhoneNumberForm - Authentication failed: username={username}, status={response.status_code}")
-                dispatcher.utter_message(text="Authentication failed. Please try again later.")
-                return {"phone_number": None}
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Authentication API call failed: {e}")
-            print(f"[DEBUG] ValidatePhoneNumberForm - API call failed: {e}")
-            dispatcher.utter_message(text="Error connecting to the authentication service. Please try again.")
+            auth_token = await token_manager.get_token()
+            logger.debug("[ValidatePhoneNumberForm] Authentication successful", extra=fields(username=username))
+        except CircuitOpenError as e:
+            # Fail fast: end the form so action_check_credit_balance hands over to a representative
+            logger.warning("[ValidatePhoneNumberForm] CLS API unavailable: %s", e)
+            dispatcher.utter_message(text=templates.render("utter_backend_unavailable"))
+            return {"phone_number": None, "requested_slot": None, "backend_unavailable": True}
+        except AuthenticationError as e:
+            logger.error("[ValidatePhoneNumberForm] Authentication failed", extra=fields(username=username, status=e.status))
+            dispatcher.utter_message(text=templates.render("utter_auth_failed"))
+            return {"phone_number": None}
+        except (ClsConnectionError, ValueError) as e:
+            logger.error("[ValidatePhoneNumberForm] Authentication API call failed: %s", e)
+            dispatcher.utter_message(text=templates.render("utter_auth_service_error"))
             return {"phone_number": None}
 
-        # API call to validate phone number (existing logic follows)
-        customers_url = "http://192.168.4.175:8443/cls_api/getAllCustomers"
-        headers = {"Authorization": f"Bearer {auth_token}"}
+        # Look the phone number up in the shared customer directory
         try:
-            response = requests.get(customers_url, headers=headers)
-            print("Customers API status:", response.status_code)
-            if response.status_code == 200:
-                try:
-                    customers = response.json()
-                    credit, matched_phone, customer_id = self.find_credit_by_phone(customers, phone_number)
-                    if matched_phone:
-                        logger.debug(f"Found customer with phone {matched_phone}, credit: {credit}, id: {customer_id}")
-                        print(f"[DEBUG] ValidatePhoneNumberForm - Setting slots: phone_number={matched_phone}, customer_id={customer_id}, credit_balance={credit}")
-                        dispatcher.utter_message(response="utter_phone_verified")
-                        return {
-                            "phone_number": matched_phone,
-                            "customer_id": customer_id,
-                            "credit_balance": credit,
-                            "username": username,
-                            "password": password,
-                            "auth_token": auth_token
-                        }
-                    else:
-                        logger.warning(f"Phone number {phone_number} not found in customer list.")
-                        print(f"[DEBUG] ValidatePhoneNumberForm - Phone number {phone_number} not found in customer list")
-                        dispatcher.utter_message(text="Phone number not found. Please provide a valid phone number.")
-                        print(f"[DEBUG] ValidatePhoneNumberForm - Clearing slot: phone_number=None")
-                        return {"phone_number": None}
-                except Exception as e:
-                    logger.error(f"Failed to parse customers JSON. Error: {e}")
-                    print(f"[DEBUG] ValidatePhoneNumberForm - Failed to parse customers JSON: {e}")
-                    dispatcher.utter_message(text="Error processing customer data. Please try again.")
-                    print(f"[DEBUG] ValidatePhoneNumberForm - Clearing slot: phone_number=None")
-                    return {"phone_number": None}
-            else:
-                logger.error(f"Customer API returned status: {response.status_code}")
-                print(f"[DEBUG] ValidatePhoneNumberForm - Customer API returned status: {response.status_code}")
-                dispatcher.utter_message(text="Error retrieving customer data. Please try again.")
-                print(f"[DEBUG] ValidatePhoneNumberForm - Clearing slot: phone_number=None")
-                return {"phone_number": None}
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Customer API call failed: {e}")
-            print(f"[DEBUG] ValidatePhoneNumberForm - Customer API call failed: {e}")
-            dispatcher.utter_message(text="Error connecting to the customer service. Please try again.")
-            print(f"[DEBUG] ValidatePhoneNumberForm - Clearing slot: phone_number=None")
+            customer = await customer_directory.lookup_phone(phone_number)
+        except CircuitOpenError as e:
+            logger.warning("[ValidatePhoneNumberForm] CLS API unavailable: %s", e)
+            dispatcher.utter_message(text=templates.render("utter_backend_unavailable"))
+            return {"phone_number": None, "requested_slot": None, "backend_unavailable": True}
+        except AuthenticationError as e:
+            logger.error("[ValidatePhoneNumberForm] Authentication failed", extra=fields(username=username, status=e.status))
+            dispatcher.utter_message(text=templates.render("utter_auth_failed"))
+            return {"phone_number": None}
+        except CustomerFetchError as e:
+            logger.error("[ValidatePhoneNumberForm] Customer API returned an error", extra=fields(status=e.status_code))
+            dispatcher.utter_message(text=templates.render("utter_customer_data_error"))
+            return {"phone_number": None}
+        except ClsConnectionError as e:
+            logger.error("[ValidatePhoneNumberForm] Customer API call failed: %s", e)
+            dispatcher.utter_message(text=templates.render("utter_customer_service_error"))
+            return {"phone_number": None}
+        except Exception as e:
+            logger.error("[ValidatePhoneNumberForm] Failed to parse customers JSON: %s", e)
+            dispatcher.utter_message(text=templates.render("utter_customer_data_invalid"))
+            return {"phone_number": None}
+
+        if customer is None:
+            logger.warning("[ValidatePhoneNumberForm] Phone number not found in customer list", extra=fields(phone_number=phone_number))
+            dispatcher.utter_message(text=templates.render("utter_phone_not_found"))
             return {"phone_number": None}
 
+        logger.debug(
+            "[ValidatePhoneNumberForm] Found customer",
+            extra=fields(phone_number=customer.phone, customer_id=customer.id, credit_balance=customer.credit_limit),
+        )
+        dispatcher.utter_message(response="utter_phone_verified")
+        return {
+            "phone_number": customer.phone,
+            "customer_id": customer.id,
+            "credit_balance": customer.credit_limit,
+            "auth_token": auth_token,
+            "backend_unavailable": None
+        }
+
 # class ActionCheckCreditBalance(Action):
 #     def name(self) -> Text:
 #         return "action_check_credit_balance"
@@ -289,31 +477,24 @@ class ActionCheckCreditBalance(Action):
     def name(self) -> Text:
         return "action_check_credit_balance"
 
-    def run(self, dispatcher: CollectingDispatcher,
+    async def run(self, dispatcher: CollectingDispatcher,
             tracker: Tracker,
             domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
-        credit = tracker.get_slot("credit_balance")
-        name = tracker.get_slot("name")
-        if credit is None:
-            msg = f"Unable to retrieve credit balance."
-            if name:
-                msg = f"Unable to retrieve credit balance, {name}."
-            dispatcher.utter_message(text=msg)
+        slots = read_slots(tracker, CreditSlots)
+        log_slots(logger, "ActionCheckCreditBalance", slots)
+        credit = slots.credit_balance
+        name = slots.name
+        # The form ends early when the CLS API is unavailable; the breaker may have
+        # closed again since, or be open in another worker only.
+        if credit is None and (slots.backend_unavailable or cls_client.breaker.is_open):
+            logger.warning("[ActionCheckCreditBalance] CLS API unavailable, connecting to a representative")
+            return [SlotSet("backend_unavailable", None), FollowupAction("action_connect_to_representative")]
+        msg, current_question = credit_reply(credit, name)
+        dispatcher.utter_message(text=msg)
+        if current_question is None:
             return []
-
-        if credit == 0.0:
-            msg = f"Your remaining credit is SAR 0.00. Would you like to see your call history?"
-            if name:
-                msg = f"{name}, your remaining credit is SAR 0.00. Would you like to see your call history?"
-            dispatcher.utter_message(text=msg)
-            current_question = "show_call_history"
-        else:
-            msg = f"Your credit is SAR {credit:.2f}. Are you still having trouble making calls?"
-            if name:
-                msg = f"{name}, your credit is SAR {credit:.2f}. Are you still having trouble making calls?"
-            dispatcher.utter_message(text=msg)
+        if current_question == "still_unable":
             credit=100
-            current_question = "still_unable"
 
         return [SlotSet("credit_balance", credit), SlotSet("current_question", current_question)]
 
@@ -321,142 +502,124 @@ class ActionShowCallHistory(Action):
     def name(self) -> Text:
         return "action_show_call_history"
 
-    def find_customer_by_phone(self, customers, phone_number):
-        for customer in customers:
-            if customer.get("phone") == phone_number:
-                return customer
-        return None
-
-    def run(self, dispatcher: CollectingDispatcher,
+    async def run(self, dispatcher: CollectingDispatcher,
             tracker: Tracker,
             domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
-        phone_number = tracker.get_slot("phone_number")
-        customer_id = tracker.get_slot("customer_id")
-        auth_token = tracker.get_slot("auth_token")
-        name = tracker.get_slot("name")
-        logger.debug(f"[ActionShowCallHistory] Fetching call history for phone_number: {phone_number}, customer_id: {customer_id}, auth_token: {auth_token}")
-        print(f"[DEBUG] ActionShowCallHistory - Fetching call history for phone_number: {phone_number}, customer_id: {customer_id}, auth_token: {auth_token}")
-        print(f"[DEBUG] ActionShowCallHistory - All slots: {tracker.current_slot_values()}")
+        slots = read_slots(tracker, CallHistorySlots)
+        phone_number, customer_id, name = slots.phone_number, slots.customer_id, slots.name
+        logger.debug(
+            "[ActionShowCallHistory] Fetching call history",
+            extra=fields(phone_number=phone_number, customer_id=customer_id),
+        )
+        log_slots(logger, "ActionShowCallHistory", slots)
 
         if not phone_number:
-            msg = "Please provide a valid phone number first."
-            if name:
-                msg = f"{name}, please provide a valid phone number first."
+            msg = templates.render("utter_phone_number_missing", name=name)
             logger.debug("[ActionShowCallHistory] Phone number is missing")
-            print(f"[DEBUG] ActionShowCallHistory - Phone number is missing")
             dispatcher.utter_message(text=msg)
             return []
 
         if not customer_id:
-            msg = "Customer ID is not set. Please provide your phone number first."
-            if name:
-                msg = f"{name}, customer ID is not set. Please provide your phone number first."
+            msg = templates.render("utter_customer_id_missing", name=name)
             logger.debug("[ActionShowCallHistory] Customer ID is missing")
-            print(f"[DEBUG] ActionShowCallHistory - Customer ID is missing")
             dispatcher.utter_message(text=msg)
             return []
 
-        if not auth_token:
-            msg = "Please authenticate first by providing your username and password."
-            if name:
-                msg = f"{name}, please authenticate first by providing your username and password."
-            logger.debug("[ActionShowCallHistory] No authentication token available")
-            print(f"[DEBUG] ActionShowCallHistory - No authentication token available")
-            dispatcher.utter_message(text=msg)
-            return []
+        # Steps 1-3: verify that customer_id still belongs to phone_number and get
+        # the call history. Both run concurrently; the history is only shown once
+        # the check has passed, and the first stage to fail cancels the other.
+        timings: Dict[Text, float] = {}
+        started = time.perf_counter()
+        verify = asyncio.ensure_future(
+            timed_stage(timings, self.name(), "verify", verify_customer(phone_number, customer_id))
+        )
+        fetch = asyncio.ensure_future(
+            timed_stage(timings, self.name(), "call_history", load_call_history(customer_id))
+        )
+        try:
+            _, pending = await asyncio.wait(
+                {verify, fetch}, timeout=CALL_HISTORY_TIMEOUT, return_when=asyncio.FIRST_EXCEPTION
+            )
+        finally:
+            for task in (verify, fetch):
+                if not task.done():
+                    task.cancel()
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "[ActionShowCallHistory] Stage timings",
+                extra=fields(
+                    total_ms=round((time.perf_counter() - started) * 1000, 1),
+                    **{f"{stage}_ms": round(seconds * 1000, 1) for stage, seconds in timings.items()},
+                ),
+            )
 
-        # Step 1: Get all customers to verify phone number and customer ID
-        customers_url = "http://192.168.4.175:8443/cls_api/getAllCustomers"
-        headers = {"Authorization": f"Bearer {auth_token}"}
+        # If the CLS API is down, only a previously fetched (and verified) call
+        # history for this customer_id can be shown.
+        degraded = False
         try:
-            response = requests.get(customers_url, headers=headers)
-            print(f"[DEBUG] ActionShowCallHistory - Customers API status: {response.status_code}")
-            if response.status_code != 200:
-                msg = "Error retrieving customer data. Please try again."
-                if name:
-                    msg = f"{name}, error retrieving customer data. Please try again."
-                logger.error(f"[ActionShowCallHistory] Failed to get customers. Status: {response.status_code}")
-                print(f"[DEBUG] ActionShowCallHistory - Failed to get customers. Status: {response.status_code}")
-                dispatcher.utter_message(text=msg)
-                return []
-
-            customers = response.json()
-            print(f"[DEBUG] ActionShowCallHistory - Total customers found: {len(customers)}")
-
-            # Step 2: Verify customer by phone number
-            matched_customer = self.find_customer_by_phone(customers, phone_number)
-            if not matched_customer or matched_customer.get("id") != customer_id:
-                msg = "Phone number or customer ID not found."
-                if name:
-                    msg = f"{name}, phone number or customer ID not found."
-                logger.warning(f"[ActionShowCallHistory] Phone number {phone_number} or customer ID {customer_id} not found")
-                print(f"[DEBUG] ActionShowCallHistory - Phone number {phone_number} or customer ID {customer_id} not found")
-                dispatcher.utter_message(text=msg)
-                return []
-
-            # Step 3: Get call history for the customer
-            calls_url = f"http://192.168.4.175:8443/cls_api/getRecentCallsByCustomerId?customerId={customer_id}"
-            calls_response = requests.get(calls_url, headers=headers)
-            print(f"[DEBUG] ActionShowCallHistory - Call history API status: {calls_response.status_code}")
-
-            if calls_response.status_code == 417:
-                msg = "No call history found."
-                if name:
-                    msg = f"{name}, no call history found."
-                logger.debug(f"[ActionShowCallHistory] No call history found for customer_id: {customer_id}")
-                print(f"[DEBUG] ActionShowCallHistory - No call history found for customer_id: {customer_id}")
-                dispatcher.utter_message(text=msg)
-                return []
-
-            if calls_response.status_code != 200:
-                msg = "Error retrieving call history. Please try again."
-                if name:
-                    msg = f"{name}, error retrieving call history. Please try again."
-                logger.error(f"[ActionShowCallHistory] Failed to get call history. Status: {calls_response.status_code}")
-                print(f"[DEBUG] ActionShowCallHistory - Failed to get call history. Status: {calls_response.status_code}")
-                dispatcher.utter_message(text=msg)
-                return []
-
-            calls = calls_response.json()
-            print(f"[DEBUG] ActionShowCallHistory - Total calls found: {len(calls)}")
-
-            if not calls:
-                msg = "No call history found for this customer."
-                if name:
-                    msg = f"{name}, no call history found for this customer."
-                logger.debug(f"[ActionShowCallHistory] No call history found for customer_id: {customer_id}")
-                print(f"[DEBUG] ActionShowCallHistory - No call history found for customer_id: {customer_id}")
-                dispatcher.utter_message(text=msg)
-                return []
+            verify_error, fetch_error = _stage_error(verify), _stage_error(fetch)
+            error = verify_error or fetch_error
+            if error is None and pending:
+                raise ClsConnectionError(f"Call history lookup timed out after {CALL_HISTORY_TIMEOUT}s")
+            if isinstance(error, CircuitOpenError):
+                logger.warning("[ActionShowCallHistory] CLS API unavailable: %s", error)
+                degraded = True
+            elif error is not None:
+                raise error
+
+            if degraded:
+                if fetch.done() and not fetch.cancelled() and fetch_error is None:
+                    history = fetch.result()[0]
+                else:
+                    history = call_history_cache.get_stale(customer_id)
+                if history is None:
+                    return backend_unavailable(dispatcher, name)
+                logger.warning("[ActionShowCallHistory] Serving cached call history", extra=fields(customer_id=customer_id))
+            else:
+                history, cached = fetch.result()
+                if not cached:
+                    await store_call_history(customer_id, history)
 
             # Step 4: Format top 5 calls
-            top_5_calls = calls[:5] if len(calls) >= 5 else calls
-            call_history = "\n".join([
-                f"- Call to {call.get('number', 'N/A')} on {call.get('callDate', 'N/A')} (Duration: {call.get('duration', 'N/A')} seconds, Type: {call.get('callType', 'N/A')})"
-                for call in top_5_calls
-            ])
-            logger.debug(f"[ActionShowCallHistory] Call history retrieved: \n{call_history}")
-            print(f"[DEBUG] ActionShowCallHistory - Call history retrieved: \n{call_history}")
-            msg = f"Here are your top 5 recent calls:\n{call_history}"
-            if name:
-                msg = f"{name}, here are your top 5 recent calls:\n{call_history}"
+            msg = call_history_reply(history, name)
+            logger.debug(
+                "[ActionShowCallHistory] Call history retrieved",
+                extra=fields(customer_id=customer_id, status=history.status, calls=len(history.calls[:CALL_HISTORY_LIMIT])),
+            )
             dispatcher.utter_message(text=msg)
             return []
 
-        except requests.exceptions.RequestException as e:
-            msg = "Error connecting to the call history service. Please try again."
-            if name:
-                msg = f"{name}, error connecting to the call history service. Please try again."
-            logger.error(f"[ActionShowCallHistory] Error connecting to API: {e}")
-            print(f"[DEBUG] ActionShowCallHistory - Error connecting to API: {e}")
+        except AuthenticationError as e:
+            msg = templates.render("utter_auth_failed", name=name)
+            logger.error("[ActionShowCallHistory] Authentication failed", extra=fields(status=e.status))
+            dispatcher.utter_message(text=msg)
+            return []
+        except CustomerFetchError as e:
+            msg = templates.render("utter_customer_data_error", name=name)
+            logger.error("[ActionShowCallHistory] Failed to get customers", extra=fields(status=e.status_code))
+            dispatcher.utter_message(text=msg)
+            return []
+        except CustomerMismatchError:
+            msg = templates.render("utter_customer_mismatch", name=name)
+            logger.warning(
+                "[ActionShowCallHistory] Phone number or customer ID not found",
+                extra=fields(phone_number=phone_number, customer_id=customer_id),
+            )
+            dispatcher.utter_message(text=msg)
+            return []
+        except CallHistoryFetchError as e:
+            msg = templates.render("utter_call_history_error", name=name)
+            logger.error("[ActionShowCallHistory] Failed to get call history", extra=fields(status=e.status_code))
+            dispatcher.utter_message(text=msg)
+            return []
+        except ClsConnectionError as e:
+            msg = templates.render("utter_call_history_service_error", name=name)
+            logger.error("[ActionShowCallHistory] Error connecting to API: %s", e)
             dispatcher.utter_message(text=msg)
             return []
         except Exception as e:
-            msg = "Error processing call history data. Please try again."
-            if name:
-                msg = f"{name}, error processing call history data. Please try again."
-            logger.error(f"[ActionShowCallHistory] Failed to parse call history: {e}")
-            print(f"[DEBUG] ActionShowCallHistory - Failed to parse call history: {e}")
+            msg = templates.render("utter_call_history_invalid", name=name)
+            logger.error("[ActionShowCallHistory] Failed to parse call history: %s", e)
             dispatcher.utter_message(text=msg)
             return []
 
@@ -464,86 +627,64 @@ class ActionConnectToRepresentative(Action):
     def name(self) -> Text:
         return "action_connect_to_representative"
 
-    def run(self, dispatcher: CollectingDispatcher,
+    async def run(self, dispatcher: CollectingDispatcher,
             tracker: Tracker,
             domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
-        logger.debug(f"[ActionConnectToRepresentative] Executing, Current slots: {tracker.current_slot_values()}")
-        print(f"[DEBUG] ActionConnectToRepresentative - Executing, Current slots: {tracker.current_slot_values()}")
-        dispatcher.utter_message(text="I’ll connect you to a Customer Service Representative shortly.")
+        logger.debug("[ActionConnectToRepresentative] Executing")
+        log_slots(logger, "ActionConnectToRepresentative", read_slots(tracker, ConversationSlots))
+        dispatcher.utter_message(response="utter_connect_to_representative")
         return []
 
 class ActionOfferCreditIncrease(Action):
     def name(self) -> Text:
         return "action_offer_credit_increase"
 
-    def run(self, dispatcher: CollectingDispatcher,
+    async def run(self, dispatcher: CollectingDispatcher,
             tracker: Tracker,
             domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
-        logger.debug(f"[ActionOfferCreditIncrease] Executing, Current slots: {tracker.current_slot_values()}")
-        print(f"[DEBUG] ActionOfferCreditIncrease - Executing, Current slots: {tracker.current_slot_values()}")
-        dispatcher.utter_message(text="Would you like to increase your credit limit?")
+        logger.debug("[ActionOfferCreditIncrease] Executing")
+        log_slots(logger, "ActionOfferCreditIncrease", read_slots(tracker, ConversationSlots))
+        dispatcher.utter_message(text=templates.render("utter_offer_credit_increase"))
         return [SlotSet("current_question", "increase_credit")]
 
 class ActionPresentPackages(Action):
     def name(self) -> Text:
         return "action_present_packages"
 
-    def run(self, dispatcher: CollectingDispatcher,
+    async def run(self, dispatcher: CollectingDispatcher,
             tracker: Tracker,
             domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
-        logger.debug(f"[ActionPresentPackages] Executing, Current slots: {tracker.current_slot_values()}")
-        print(f"[DEBUG] ActionPresentPackages - Executing, Current slots: {tracker.current_slot_values()}")
-        dispatcher.utter_message(
-            attachment={
-                "type": "carousel",
-                "packages": [
-                    {
-                        "title": "A. VoxEdge package",
-                        "details": "Additional Minutes: +100\nValidity: 30 days\nPrice: $1.99",
-                        "id": "A"
-                    },
-                    {
-                        "title": "B. VoxEdge package",
-                        "details": "Additional Minutes: +175\nValidity: 60 days\nPrice: $3.99",
-                        "id": "B"
-                    },
-                    {
-                        "title": "C. VoxEdge package",
-                        "details": "Additional Minutes: +300\nValidity: 90 days\nPrice: $8.99",
-                        "id": "C"
-                    }
-                ],
-            }
-        )
+        logger.debug("[ActionPresentPackages] Executing")
+        log_slots(logger, "ActionPresentPackages", read_slots(tracker, ConversationSlots))
+        dispatcher.utter_message(attachment=catalogue.attachment())
         return [SlotSet("current_question", "choose_package"),SlotSet("username", None),SlotSet("password", None),SlotSet("auth_token", None)]
 
 class ActionUpgradePackage(Action):
     def name(self) -> Text:
         return "action_upgrade_package"
 
-    def run(self, dispatcher: CollectingDispatcher,
+    async def run(self, dispatcher: CollectingDispatcher,
             tracker: Tracker,
             domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
-        package_choice = tracker.get_slot("package_choice")
-        logger.debug(f"[ActionUpgradePackage] Upgrading package: {package_choice}, Current slots: {tracker.current_slot_values()}")
-        print(f"[DEBUG] ActionUpgradePackage - Upgrading package: {package_choice}, Current slots: {tracker.current_slot_values()}")
-        if package_choice:
-            package_choice_upper = str(package_choice).strip().upper()
-            print(f"[DEBUG] ActionUpgradePackage - Normalized package_choice: {package_choice_upper}")
-            if package_choice_upper in ["A", "B", "C"]:
-                dispatcher.utter_message(response="utter_upgrade_confirmation", package_choice=package_choice_upper)
-                return []
-        dispatcher.utter_message(text="Invalid package choice. Please choose A, B, or C.")
+        slots = read_slots(tracker, PackageSlots)
+        package_choice = slots.package_choice
+        logger.debug("[ActionUpgradePackage] Upgrading package", extra=fields(package_choice=package_choice))
+        log_slots(logger, "ActionUpgradePackage", slots)
+        package = catalogue.get(package_choice) if package_choice else None
+        if package is not None:
+            dispatcher.utter_message(response="utter_upgrade_confirmation", package_choice=package.id)
+            return []
+        dispatcher.utter_message(text=templates.render("utter_invalid_package_choice"))
         return [SlotSet("package_choice", None)]
 
 class ActionOfferRepresentative(Action):
     def name(self) -> Text:
         return "action_offer_representative"
 
-    def run(self, dispatcher: CollectingDispatcher,
+    async def run(self, dispatcher: CollectingDispatcher,
             tracker: Tracker,
             domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
-        logger.debug(f"[ActionOfferRepresentative] Executing, Current slots: {tracker.current_slot_values()}")
-        print(f"[DEBUG] ActionOfferRepresentative - Executing, Current slots: {tracker.current_slot_values()}")
+        logger.debug("[ActionOfferRepresentative] Executing")
+        log_slots(logger, "ActionOfferRepresentative", read_slots(tracker, ConversationSlots))
         dispatcher.utter_message(response="utter_offer_representative")
         return [SlotSet("current_question", "speak_to_representative")]
@@ -0,0 +1,142 @@
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Awaitable, Callable, Optional, Text
+
+import jwt
+
+from actions.cls_client import ClsClient, ClsResponse, cls_client
+from actions.shared_cache import SharedCache, shared_cache
+
+logger = logging.getLogger(__name__)
+
+SHARED_TOKEN_KEY = "cls_token"
+
+
+class AuthenticationError(Exception):
+    def __init__(self, status: int) -> None:
+        super().__init__(f"CLS authentication failed with status {status}")
+        self.status = status
+
+
+class TokenManager:
+    """Process-wide cache for the CLS bearer token.
+
+    The expiry is read from the token's `exp` claim. Once a token is within
+    `refresh_margin` seconds of expiring it is still handed out while a
+    replacement is fetched in the background; an expired token makes callers wait
+    for the new one. Either way at most one authenticate call is in flight.
+
+    With a `shared` cache the token is also shared between worker processes:
+    a worker first adopts a token another worker published, and only one worker
+    at a time authenticates. A token the CLS API rejected is never adopted again,
+    so a 401 replaces the shared token for all workers.
+    """
+
+    def __init__(
+        self,
+        client: ClsClient,
+        username: Text,
+        password: Text,
+        refresh_margin: float = 60.0,
+        default_ttl: float = 300.0,
+        shared: Optional[SharedCache] = None,
+    ) -> None:
+        self.client = client
+        self.username = username
+        self.password = password
+        self.refresh_margin = refresh_margin
+        self.default_ttl = default_ttl
+        self.shared = shared
+
+        self._token: Optional[Text] = None
+        self._expires_at = 0.0
+        self._inflight: Optional[asyncio.Future] = None
+        self._rejected: Optional[Text] = None
+
+        self.authentications = 0
+
+    async def get_token(self) -> Text:
+        remaining = self._expires_at - time.time()
+        if self._token is not None and remaining > 0:
+            if remaining <= self.refresh_margin:
+                self._refresh()
+            return self._token
+        # Shielded: a cancelled caller must not cancel the authentication the others wait for.
+        return await asyncio.shield(self._refresh())
+
+    def invalidate(self, token: Optional[Text] = None) -> None:
+        """Forget the cached token, unless it has already been replaced.
+
+        A `token` the CLS API rejected is also not adopted from the shared cache again.
+        """
+        if token is not None:
+            self._rejected = token
+        if token is None or token == self._token:
+            self._token = None
+            self._expires_at = 0.0
+
+    async def call(self, request: Callable[[Text], Awaitable[ClsResponse]]) -> ClsResponse:
+        """Run `request` with a valid token, re-authenticating once on a 401."""
+        token = await self.get_token()
+        response = await request(token)
+        if response.status == 401:
+            logger.debug("CLS API rejected the cached token, re-authenticating")
+            self.invalidate(token)
+            response = await request(await self.get_token())
+        return response
+
+    def _refresh(self) -> "asyncio.Future[Text]":
+        if self._inflight is None or self._inflight.done():
+            self._inflight = asyncio.ensure_future(self._authenticate())
+            self._inflight.add_done_callback(self._log_failure)
+        return self._inflight
+
+    @staticmethod
+    def _log_failure(future: "asyncio.Future[Text]") -> None:
+        if not future.cancelled() and future.exception() is not None:
+            logger.error("CLS authentication failed: %s", future.exception())
+
+    async def _authenticate(self) -> Text:
+        if self.shared is None or not self.shared.enabled:
+            token = await self._fetch_token()
+        else:
+            token = await self.shared.get(SHARED_TOKEN_KEY)
+            if not token or token == self._rejected or self._read_expiry(token) - time.time() <= self.refresh_margin:
+                token = await self.shared.fill(
+                    SHARED_TOKEN_KEY, self._fetch_token, ttl=lambda t: self._read_expiry(t) - time.time()
+                )
+                if token == self._rejected:
+                    # Read back after another worker's fill that did not replace it.
+                    token = await self._fetch_token()
+                    await self.shared.set(SHARED_TOKEN_KEY, token, self._read_expiry(token) - time.time())
+
+        self._token = token
+        self._expires_at = self._read_expiry(token)
+        logger.debug("Authenticated with CLS API as %s, token valid for %.0fs", self.username, self._expires_at - time.time())
+        return token
+
+    async def _fetch_token(self) -> Text:
+        response = await self.client.authenticate(self.username, self.password)
+        self.authentications += 1
+        token = response.json().get("token") if response.status == 200 else None
+        if not token:
+            raise AuthenticationError(response.status)
+        return token
+
+    def _read_expiry(self, token: Text) -> float:
+        try:
+            claims: Any = jwt.decode(token, options={"verify_signature": False})
+            return float(claims["exp"])
+        except (jwt.PyJWTError, KeyError, TypeError, ValueError):
+            return time.time() + self.default_ttl
+
+
+token_manager = TokenManager(
+    cls_client,
+    username=os.environ.get("CLS_USERNAME", "mminds"),
+    password=os.environ.get("CLS_PASSWORD", "mm123"),
+    refresh_margin=float(os.environ.get("CLS_TOKEN_REFRESH_MARGIN", "60")),
+    shared=shared_cache,
+)
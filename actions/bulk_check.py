@@ -0,0 +1,197 @@
+"""Credit balance checks for many phone numbers at once.
+
+Runs the lookups of ValidatePhoneNumberForm and ActionCheckCreditBalance (and
+optionally action_show_call_history) for every number in a JSONL or CSV input,
+and writes one JSON result per number, in input order:
+
+    python -m actions.bulk_check numbers.csv --call-history > results.jsonl
+
+JSONL input has one `{"phone_number": ...}` object or JSON string per line; CSV
+input uses the `phone_number` (or `phone`) column, or the first column if there
+is no header. All numbers are resolved against the action server's customer
+directory, and at most `concurrency` numbers are checked at a time. The action
+server serves the same on `POST /bulk/check` when ACTION_BULK_CHECK_TOKEN is
+set, to callers that send it as a bearer token.
+"""
+
+import argparse
+import asyncio
+import codecs
+import csv
+import json
+import logging
+import sys
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Dict, Iterable, Optional, Text
+
+from actions.actions import (
+    PHONE_NUMBER_FORMAT,
+    CallHistoryFetchError,
+    CustomerFetchError,
+    call_history_reply,
+    credit_reply,
+    customer_directory,
+    load_call_history,
+    store_call_history,
+)
+from actions.auth import AuthenticationError
+from actions.cls_client import CircuitOpenError, ClsConnectionError, cls_client
+from actions.shared_cache import shared_cache
+
+logger = logging.getLogger(__name__)
+
+PHONE_COLUMNS = ("phone_number", "phone")
+# ValueError covers a backend body that is not valid JSON (json.JSONDecodeError).
+BACKEND_ERRORS = (
+    AuthenticationError, CircuitOpenError, ClsConnectionError, CustomerFetchError, CallHistoryFetchError, ValueError
+)
+
+
+def parse_jsonl(line: Text) -> Optional[Text]:
+    value = json.loads(line)
+    if isinstance(value, dict):
+        value = next((value[column] for column in PHONE_COLUMNS if column in value), None)
+    return None if value is None else str(value)
+
+
+async def read_phone_numbers(lines: AsyncIterator[Text], input_format: Text = "jsonl") -> AsyncIterator[Text]:
+    """Phone numbers from JSONL or CSV lines. Blank lines are skipped."""
+    column: Optional[int] = None
+    async for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        if input_format == "jsonl":
+            try:
+                phone_number = parse_jsonl(line)
+            except ValueError:
+                phone_number = line
+            yield phone_number or ""
+            continue
+
+        row = next(csv.reader([line]))
+        if column is None:
+            header = [cell.strip().lower() for cell in row]
+            column = next((header.index(name) for name in PHONE_COLUMNS if name in header), -1)
+            if column >= 0:
+                continue
+            column = 0
+        yield row[column].strip() if column < len(row) else ""
+
+
+async def check_phone_number(phone_number: Text, call_history: bool = False) -> Dict[Text, Any]:
+    result: Dict[Text, Any] = {"phone_number": phone_number}
+    if not PHONE_NUMBER_FORMAT.match(phone_number):
+        result["status"] = "invalid_format"
+        return result
+
+    try:
+        customer = await customer_directory.lookup_phone(phone_number)
+        if customer is None:
+            result["status"] = "not_found"
+            return result
+
+        message, current_question = credit_reply(customer.credit_limit)
+        result.update(
+            status="ok",
+            customer_id=customer.id,
+            credit_balance=customer.credit_limit,
+            credit_increase_eligible=current_question == "show_call_history",
+            message=message,
+        )
+        if call_history:
+            history, cached = await load_call_history(customer.id)
+            if not cached:
+                await store_call_history(customer.id, history)
+            result["call_history"] = call_history_reply(history)
+    except BACKEND_ERRORS as e:
+        result.update(status="error", error=f"{type(e).__name__}: {e}")
+    return result
+
+
+async def load_directory() -> None:
+    """Make sure the customer directory is loaded and fresh. Backend errors are raised."""
+    if customer_directory.is_stale():
+        await customer_directory.refresh()
+
+
+async def decode_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[Text]:
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    buf = ""
+    async for chunk in chunks:
+        buf += decoder.decode(chunk)
+        *lines, buf = buf.split("\n")
+        for line in lines:
+            yield line
+    buf += decoder.decode(b"", final=True)
+    if buf:
+        yield buf
+
+
+async def check_phone_numbers(
+    phone_numbers: AsyncIterator[Text], call_history: bool = False, concurrency: int = 20
+) -> AsyncIterator[Dict[Text, Any]]:
+    """Check numbers with at most `concurrency` in flight, yielding results in input order.
+
+    Call `load_directory` first, so a CLS outage fails the whole batch up front
+    instead of every number.
+    """
+    pending: Deque["asyncio.Future[Dict[Text, Any]]"] = deque()
+    try:
+        async for phone_number in phone_numbers:
+            pending.append(asyncio.ensure_future(check_phone_number(phone_number, call_history)))
+            if len(pending) >= concurrency:
+                yield await pending.popleft()
+        while pending:
+            yield await pending.popleft()
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+async def _file_lines(lines: Iterable[Text]) -> AsyncIterator[Text]:
+    for line in lines:
+        yield line
+
+
+async def run(args: argparse.Namespace) -> int:
+    input_format = args.format or ("csv" if args.input.endswith(".csv") else "jsonl")
+    try:
+        await load_directory()
+    except BACKEND_ERRORS as e:
+        logger.error("Could not load the customer list: %s", e)
+        return 1
+
+    counts: Dict[Text, int] = {}
+    source = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8", newline="")
+    try:
+        phone_numbers = read_phone_numbers(_file_lines(source), input_format)
+        async for result in check_phone_numbers(phone_numbers, args.call_history, args.concurrency):
+            counts[result["status"]] = counts.get(result["status"], 0) + 1
+            sys.stdout.write(json.dumps(result) + "\n")
+    finally:
+        if source is not sys.stdin:
+            source.close()
+    logger.info("Checked %d phone numbers: %s", sum(counts.values()), counts)
+    return 1 if counts.get("error") else 0
+
+
+async def main(args: argparse.Namespace) -> int:
+    try:
+        return await run(args)
+    finally:
+        await cls_client.close()
+        await shared_cache.close()
+
+
+def create_argument_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Check the credit balance of many phone numbers")
+    parser.add_argument("input", help="JSONL or CSV file of phone numbers, or - for stdin")
+    parser.add_argument("--format", choices=["jsonl", "csv"], help="Input format (default: from the file extension)")
+    parser.add_argument("--call-history", action="store_true", help="Also fetch each customer's recent calls")
+    parser.add_argument("--concurrency", type=int, default=20, help="Numbers checked at the same time")
+    return parser
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(create_argument_parser().parse_args())))
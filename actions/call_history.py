@@ -0,0 +1,58 @@
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, NamedTuple, Optional, Text, Tuple
+
+
+class CallHistory(NamedTuple):
+    # HTTP status of getRecentCallsByCustomerId: 200, or 417 when the customer
+    # has no call history.
+    status: int
+    calls: List[Dict[Text, Any]]
+
+
+class CallHistoryCache:
+    """Bounded LRU cache of recent-call results per customer_id, with a TTL."""
+
+    def __init__(self, max_entries: int = 1000, ttl: float = 60.0) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[Any, Tuple[float, CallHistory]]" = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, customer_id: Any) -> Optional[CallHistory]:
+        entry = self._entries.get(customer_id)
+        if entry is None or time.monotonic() - entry[0] > self.ttl:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(customer_id)
+        self.hits += 1
+        return entry[1]
+
+    def get_stale(self, customer_id: Any) -> Optional[CallHistory]:
+        """Return the cached result even if it has outlived the TTL."""
+        entry = self._entries.get(customer_id)
+        return entry[1] if entry is not None else None
+
+    def put(self, customer_id: Any, history: CallHistory) -> None:
+        self._entries[customer_id] = (time.monotonic(), history)
+        self._entries.move_to_end(customer_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, customer_id: Any) -> None:
+        self._entries.pop(customer_id, None)
+
+    def stats(self) -> Dict[Text, int]:
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
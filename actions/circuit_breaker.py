@@ -0,0 +1,66 @@
+import logging
+import time
+from typing import Optional, Text
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Stops calling an upstream after `failure_threshold` consecutive failures.
+
+    While open, `allow()` returns False so callers fail fast. After
+    `reset_timeout` seconds the breaker is half open and lets a single trial call
+    through: success closes it again, failure re-opens it.
+    """
+
+    def __init__(self, name: Text, failure_threshold: int = 5, reset_timeout: float = 30.0) -> None:
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_started: Optional[float] = None
+
+    @property
+    def state(self) -> Text:
+        if self._opened_at is None:
+            return CLOSED
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            return HALF_OPEN
+        return OPEN
+
+    @property
+    def is_open(self) -> bool:
+        return self.state == OPEN
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == CLOSED:
+            return True
+        if state == OPEN:
+            return False
+        now = time.monotonic()
+        # A trial that never reported back (e.g. its caller was cancelled) does not
+        # block the next one forever.
+        if self._trial_started is not None and now - self._trial_started < self.reset_timeout:
+            return False
+        self._trial_started = now
+        return True
+
+    def record_success(self) -> None:
+        if self._opened_at is not None:
+            logger.info("Circuit %s closed", self.name)
+        self.failures = 0
+        self._opened_at = None
+        self._trial_started = None
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._trial_started = None
+        if self.state == HALF_OPEN or (self._opened_at is None and self.failures >= self.failure_threshold):
+            logger.warning("Circuit %s opened after %d consecutive failures", self.name, self.failures)
+            self._opened_at = time.monotonic()
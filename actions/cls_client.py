@@ -0,0 +1,205 @@
+import asyncio
+import logging
+from typing import Any, Dict, Optional, Text
+
+import aiohttp
+
+from actions.circuit_breaker import CircuitBreaker
+from actions.config import ClsConfig, load_cls_config
+from actions.json_stream import read_array_prefix
+from actions.metrics import UPSTREAM_ERRORS, UPSTREAM_IN_FLIGHT, UPSTREAM_LATENCY, UPSTREAM_RESPONSES
+from actions.singleflight import SingleFlight
+from actions.tracing import span, trace_headers
+logger = logging.getLogger(__name__)
+
+AUTHENTICATE = "auth/authenticate"
+GET_ALL_CUSTOMERS = "getAllCustomers"
+GET_RECENT_CALLS = "getRecentCallsByCustomerId"
+
+# Total time allowed per request, in seconds. getAllCustomers returns the whole
+# customer list, so it gets the most headroom.
+DEFAULT_TIMEOUTS = {
+    AUTHENTICATE: 5.0,
+    GET_ALL_CUSTOMERS: 20.0,
+    GET_RECENT_CALLS: 10.0,
+}
+
+RETRY_STATUSES = {502, 503, 504}
+
+
+class ClsConnectionError(Exception):
+    """Raised when the CLS API could not be reached after all retries."""
+
+
+class CircuitOpenError(ClsConnectionError):
+    """Raised without contacting the CLS API while its circuit breaker is open."""
+
+
+class ClsResponse:
+    def __init__(self, status: int, data: Any) -> None:
+        self.status = status
+        self.data = data
+
+    def json(self) -> Any:
+        if isinstance(self.data, Exception):
+            raise self.data
+        return self.data
+
+
+class ClsClient:
+    """Shared asyncio client for the CLS API.
+
+    One keep-alive connection pool is used for every action, at most
+    `max_concurrency` requests are in flight at once, and connection errors,
+    timeouts and 502/503/504 responses are retried with exponential backoff.
+    Identical GET requests issued concurrently share a single upstream call.
+    Consecutive failures open a circuit breaker, after which requests fail fast
+    with CircuitOpenError until the backend recovers.
+    """
+
+    def __init__(self, config: ClsConfig) -> None:
+        self.base_url = config.url.rstrip("/")
+        self.timeouts = dict(DEFAULT_TIMEOUTS, **config.timeouts)
+        self.pool_size = config.pool_size
+        self.max_concurrency = config.max_concurrency
+        self.retries = config.retries
+        self.backoff = config.backoff
+        self.breaker = CircuitBreaker(
+            "cls_api", failure_threshold=config.failure_threshold, reset_timeout=config.reset_timeout
+        )
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.flights = SingleFlight()
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        # Created lazily so the session and semaphore bind to the event loop the
+        # action server is actually running on.
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.pool_size, keepalive_timeout=30)
+            self._session = aiohttp.ClientSession(connector=connector)
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._session
+
+    async def close(self) -> None:
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def request(
+        self,
+        method: Text,
+        endpoint: Text,
+        params: Optional[Dict[Text, Any]] = None,
+        auth_token: Optional[Text] = None,
+        limit: Optional[int] = None,
+    ) -> ClsResponse:
+        """Send a request and decode its JSON body.
+
+        With `limit`, a JSON array body is only read up to its first `limit`
+        items and the rest of the response is discarded.
+        """
+        if method != "GET":
+            return await self._send(method, endpoint, params, auth_token, limit)
+        key = (endpoint, tuple(sorted((params or {}).items())), auth_token, limit)
+        return await self.flights.do(
+            key, lambda: self._send(method, endpoint, params, auth_token, limit), label=endpoint
+        )
+
+    async def _send(
+        self,
+        method: Text,
+        endpoint: Text,
+        params: Optional[Dict[Text, Any]],
+        auth_token: Optional[Text],
+        limit: Optional[int],
+    ) -> ClsResponse:
+        if not self.breaker.allow():
+            UPSTREAM_ERRORS.inc(endpoint=endpoint, error="CircuitOpen")
+            raise CircuitOpenError(f"{method} {endpoint} skipped, CLS API circuit is open")
+
+        with UPSTREAM_IN_FLIGHT.track_inprogress(endpoint=endpoint), UPSTREAM_LATENCY.time(endpoint=endpoint), \
+                span(f"cls:{endpoint}", method=method) as trace_span:
+            try:
+                response = await self._send_with_retries(method, endpoint, params, auth_token, limit)
+            except ClsConnectionError as e:
+                self.breaker.record_failure()
+                UPSTREAM_ERRORS.inc(endpoint=endpoint, error=type(e.__cause__).__name__)
+                raise
+            if trace_span is not None:
+                trace_span.tags["status"] = response.status
+        if response.status >= 500:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        UPSTREAM_RESPONSES.inc(endpoint=endpoint, status=str(response.status))
+        return response
+
+    async def _send_with_retries(
+        self,
+        method: Text,
+        endpoint: Text,
+        params: Optional[Dict[Text, Any]],
+        auth_token: Optional[Text],
+        limit: Optional[int],
+    ) -> ClsResponse:
+        session = self._get_session()
+        url = f"{self.base_url}/{endpoint}"
+        headers = trace_headers()
+        if auth_token:
+            headers["Authorization"] = f"Bearer {auth_token}"
+        timeout = aiohttp.ClientTimeout(total=self.timeouts.get(endpoint, 10.0))
+
+        attempt = 0
+        while True:
+            try:
+                async with self._semaphore:
+                    async with session.request(
+                        method, url, params=params, headers=headers or None, timeout=timeout
+                    ) as response:
+                        if response.status in RETRY_STATUSES and attempt < self.retries:
+                            raise _RetryableStatus(response.status)
+                        try:
+                            if limit is not None and response.status == 200:
+                                data = await read_array_prefix(
+                                    response.content.iter_chunked(64 * 1024), limit
+                                )
+                            else:
+                                data = await response.json(content_type=None)
+                        except ValueError as e:
+                            data = e
+                        return ClsResponse(response.status, data)
+            except (aiohttp.ClientError, asyncio.TimeoutError, _RetryableStatus) as e:
+                if attempt >= self.retries:
+                    raise ClsConnectionError(f"{method} {endpoint} failed: {e!r}") from e
+                delay = self.backoff * (2 ** attempt)
+                attempt += 1
+                logger.warning("CLS %s %s failed (%r), retry %d in %.2fs", method, endpoint, e, attempt, delay)
+                await asyncio.sleep(delay)
+
+    async def authenticate(self, username: Text, password: Text) -> ClsResponse:
+        return await self.request(
+            "POST", AUTHENTICATE, params={"username": username, "password": password}
+        )
+
+    async def get_all_customers(self, auth_token: Text) -> ClsResponse:
+        return await self.request("GET", GET_ALL_CUSTOMERS, auth_token=auth_token)
+
+    async def get_recent_calls(
+        self, auth_token: Text, customer_id: Any, limit: Optional[int] = None
+    ) -> ClsResponse:
+        return await self.request(
+            "GET",
+            GET_RECENT_CALLS,
+            params={"customerId": str(customer_id)},
+            auth_token=auth_token,
+            limit=limit,
+        )
+
+
+class _RetryableStatus(Exception):
+    def __init__(self, status: int) -> None:
+        super().__init__(f"status {status}")
+        self.status = status
+
+
+cls_client = ClsClient(load_cls_config())
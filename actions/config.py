@@ -0,0 +1,101 @@
+"""Action server settings for the CLS API, the shared cache and the package catalogue.
+
+Values are read from the `cls_api`, `shared_cache` and `packages` sections of
+endpoints.yml and can be overridden per deployment with environment variables.
+"""
+
+import logging
+import os
+from typing import Any, Dict, NamedTuple, Optional, Text
+
+import yaml
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_ENDPOINTS_PATH = os.path.join(PROJECT_ROOT, "endpoints.yml")
+
+
+class ClsConfig(NamedTuple):
+    url: Text = "http://192.168.4.175:8443/cls_api"
+    # Per-endpoint request timeouts in seconds, keyed by endpoint path.
+    timeouts: Dict[Text, float] = {}
+    pool_size: int = 100
+    max_concurrency: int = 50
+    retries: int = 2
+    backoff: float = 0.2
+    failure_threshold: int = 5
+    reset_timeout: float = 30.0
+
+
+def read_endpoints_section(section: Text, path: Optional[Text] = None) -> Dict[Text, Any]:
+    path = path or os.environ.get("ACTION_ENDPOINTS", DEFAULT_ENDPOINTS_PATH)
+    try:
+        with open(path, encoding="utf-8") as f:
+            return (yaml.safe_load(f) or {}).get(section) or {}
+    except FileNotFoundError:
+        logger.warning("Endpoints file %s not found, using defaults for %s", path, section)
+        return {}
+
+
+def load_cls_config(path: Optional[Text] = None) -> ClsConfig:
+    section = read_endpoints_section("cls_api", path)
+    breaker = section.get("circuit_breaker") or {}
+    env = os.environ
+    defaults = ClsConfig()
+    return ClsConfig(
+        url=env.get("CLS_BASE_URL", section.get("url", defaults.url)),
+        timeouts={k: float(v) for k, v in (section.get("timeouts") or {}).items()},
+        pool_size=int(env.get("CLS_POOL_SIZE", section.get("pool_size", defaults.pool_size))),
+        max_concurrency=int(env.get("CLS_MAX_CONCURRENCY", section.get("max_concurrency", defaults.max_concurrency))),
+        retries=int(env.get("CLS_RETRIES", section.get("retries", defaults.retries))),
+        backoff=float(env.get("CLS_BACKOFF", section.get("backoff", defaults.backoff))),
+        failure_threshold=int(
+            env.get("CLS_BREAKER_FAILURES", breaker.get("failure_threshold", defaults.failure_threshold))
+        ),
+        reset_timeout=float(env.get("CLS_BREAKER_RESET", breaker.get("reset_timeout", defaults.reset_timeout))),
+    )
+
+
+class SharedCacheConfig(NamedTuple):
+    # Redis URL, e.g. redis://localhost:6379/0. None keeps every cache per process.
+    url: Optional[Text] = None
+    prefix: Text = "rasa_actions:"
+    # Longest a worker holds the lock while fetching a value the others wait for.
+    lock_timeout: float = 30.0
+
+
+def load_shared_cache_config(path: Optional[Text] = None) -> SharedCacheConfig:
+    section = read_endpoints_section("shared_cache", path)
+    env = os.environ
+    defaults = SharedCacheConfig()
+    return SharedCacheConfig(
+        url=env.get("ACTION_SHARED_CACHE_URL", section.get("url", defaults.url)) or None,
+        prefix=env.get("ACTION_SHARED_CACHE_PREFIX", section.get("prefix", defaults.prefix)),
+        lock_timeout=float(
+            env.get("ACTION_SHARED_CACHE_LOCK_TIMEOUT", section.get("lock_timeout", defaults.lock_timeout))
+        ),
+    )
+
+
+class PackagesConfig(NamedTuple):
+    path: Text = os.path.join(PROJECT_ROOT, "packages.yml")
+    # URL the chat widget fetches the carousel from, e.g.
+    # https://actions.example.com/packages. None sends the packages inline.
+    public_url: Optional[Text] = None
+    # Seconds between checks of the catalogue file for changes.
+    reload_interval: float = 10.0
+
+
+def load_packages_config(path: Optional[Text] = None) -> PackagesConfig:
+    section = read_endpoints_section("packages", path)
+    env = os.environ
+    defaults = PackagesConfig()
+    catalogue_path = env.get("ACTION_PACKAGES_PATH", section.get("path")) or defaults.path
+    return PackagesConfig(
+        path=os.path.join(PROJECT_ROOT, catalogue_path),
+        public_url=env.get("ACTION_PACKAGES_URL", section.get("public_url", defaults.public_url)) or None,
+        reload_interval=float(
+            env.get("ACTION_PACKAGES_RELOAD_INTERVAL", section.get("reload_interval", defaults.reload_interval))
+        ),
+    )
@@ -0,0 +1,204 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional, Text, Tuple
+
+from actions.singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+
+class CustomerRecord(NamedTuple):
+    id: Any
+    phone: Text
+    credit_limit: Any
+
+
+# Returns the raw getAllCustomers payload.
+CustomerFetcher = Callable[[], Awaitable[List[Dict[Text, Any]]]]
+
+
+class CustomerDirectory:
+    """In-process index of the CLS customer list keyed by phone and id.
+
+    The first lookup loads the list synchronously. After that a stale index keeps
+    serving lookups while a background task reloads it, and a phone number that
+    is not in the index triggers one direct reload (rate limited by
+    `miss_refresh_interval`) so newly created customers are still found.
+
+    At most `max_entries` customers are indexed. If the list is longer, the rest
+    of it is kept unindexed from the same fetch, and a lookup that misses the
+    index scans it and keeps what it found in an LRU of `overflow_entries`
+    records, so customers past the cap are still found without another fetch.
+    """
+
+    def __init__(
+        self,
+        fetcher: CustomerFetcher,
+        ttl: float = 300.0,
+        miss_refresh_interval: float = 30.0,
+        max_entries: int = 200000,
+        overflow_entries: int = 10000,
+    ) -> None:
+        self._fetcher = fetcher
+        self.ttl = ttl
+        self.miss_refresh_interval = miss_refresh_interval
+        self.max_entries = max_entries
+        self.overflow_entries = overflow_entries
+
+        self._by_phone: Dict[Text, CustomerRecord] = {}
+        self._by_id: Dict[Any, CustomerRecord] = {}
+        self._overflow: "OrderedDict[Tuple[Text, Any], CustomerRecord]" = OrderedDict()
+        self._unindexed: List[Dict[Text, Any]] = []
+        self.truncated = False
+        self._loaded_at: Optional[float] = None
+        self._refresh_task: Optional[asyncio.Future] = None
+        self._flights = SingleFlight()
+
+        self.hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+        self.refreshes = 0
+        self.refresh_failures = 0
+        self.direct_fetches = 0
+        self.overflow_scans = 0
+
+    def __len__(self) -> int:
+        return len(self._by_phone)
+
+    @property
+    def age(self) -> Optional[float]:
+        if self._loaded_at is None:
+            return None
+        return time.monotonic() - self._loaded_at
+
+    def is_stale(self) -> bool:
+        age = self.age
+        return age is None or age > self.ttl
+
+    async def lookup_phone(self, phone_number: Text) -> Optional[CustomerRecord]:
+        return await self._lookup("phone", phone_number)
+
+    async def lookup_id(self, customer_id: Any) -> Optional[CustomerRecord]:
+        return await self._lookup("id", customer_id)
+
+    async def refresh(self) -> None:
+        """Reload the index from the backend. Fetch errors are raised to the caller.
+
+        Concurrent refreshes (e.g. a burst of lookups on a cold directory) share
+        one fetch and one index build.
+        """
+        await self._flights.do("refresh", self._load)
+
+    async def _load(self) -> None:
+        customers = await self._fetcher()
+        by_phone: Dict[Text, CustomerRecord] = {}
+        by_id: Dict[Any, CustomerRecord] = {}
+        unindexed: List[Dict[Text, Any]] = []
+        for i, customer in enumerate(customers):
+            phone = customer.get("phone")
+            if not phone:
+                continue
+            if len(by_phone) >= self.max_entries:
+                unindexed = customers[i:]
+                logger.warning(
+                    "Customer directory is full (%d entries), the rest of the customer list is looked up on demand",
+                    self.max_entries,
+                )
+                break
+            record = CustomerRecord(customer.get("id"), phone, customer.get("creditLimit"))
+            by_phone.setdefault(phone, record)
+            by_id.setdefault(record.id, record)
+
+        self._by_phone = by_phone
+        self._by_id = by_id
+        self._unindexed = unindexed
+        self._overflow.clear()
+        self.truncated = bool(unindexed)
+        self._loaded_at = time.monotonic()
+        self.refreshes += 1
+        logger.debug("Customer directory refreshed with %d customers", len(by_phone))
+
+    def invalidate(self) -> None:
+        self._loaded_at = None
+
+    def stats(self) -> Dict[Text, Any]:
+        return {
+            "size": len(self._by_phone),
+            "age": self.age,
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale_hits": self.stale_hits,
+            "refreshes": self.refreshes,
+            "refresh_failures": self.refresh_failures,
+            "direct_fetches": self.direct_fetches,
+            "overflow_size": len(self._overflow),
+            "overflow_scans": self.overflow_scans,
+        }
+
+    def _index(self, key_type: Text) -> Dict[Any, CustomerRecord]:
+        # `refresh` swaps the dicts wholesale, so always read through the attribute.
+        return self._by_phone if key_type == "phone" else self._by_id
+
+    async def _lookup(self, key_type: Text, key: Any) -> Optional[CustomerRecord]:
+        stale = False
+        loaded = False
+        if self._loaded_at is None:
+            self.direct_fetches += 1
+            await self._flights.do("refresh", self._load)
+            loaded = True
+        elif self.is_stale():
+            stale = True
+            self._refresh_in_background()
+
+        record = self._index(key_type).get(key) or self._overflow_get(key_type, key)
+        if record is not None:
+            self.hits += 1
+            if stale:
+                self.stale_hits += 1
+            return record
+
+        self.misses += 1
+        if not loaded:
+            age = self.age
+            if age is not None and age > self.miss_refresh_interval:
+                self.direct_fetches += 1
+                await self._flights.do("refresh", self._load)
+                record = self._index(key_type).get(key)
+        if record is None and self.truncated:
+            record = self._scan(key_type, key)
+        return record
+
+    def _overflow_get(self, key_type: Text, key: Any) -> Optional[CustomerRecord]:
+        record = self._overflow.get((key_type, key))
+        if record is not None:
+            self._overflow.move_to_end((key_type, key))
+        return record
+
+    def _scan(self, key_type: Text, key: Any) -> Optional[CustomerRecord]:
+        """Find a customer past the index cap in the last fetched list, and keep it in the overflow LRU."""
+        self.overflow_scans += 1
+        field = "phone" if key_type == "phone" else "id"
+        customer = next((c for c in self._unindexed if c.get("phone") and c.get(field) == key), None)
+        if customer is None:
+            return None
+        record = CustomerRecord(customer.get("id"), customer["phone"], customer.get("creditLimit"))
+        for entry in (("phone", record.phone), ("id", record.id)):
+            self._overflow[entry] = record
+            self._overflow.move_to_end(entry)
+        while len(self._overflow) > 2 * self.overflow_entries:
+            self._overflow.popitem(last=False)
+        return record
+
+    def _refresh_in_background(self) -> None:
+        if self._refresh_task is not None and not self._refresh_task.done():
+            return
+        self._refresh_task = asyncio.ensure_future(self._background_refresh())
+
+    async def _background_refresh(self) -> None:
+        try:
+            await self.refresh()
+        except Exception as e:
+            self.refresh_failures += 1
+            logger.error("Background customer directory refresh failed: %s", e)
@@ -0,0 +1,86 @@
+import codecs
+import json
+from typing import Any, AsyncIterator, List, Optional
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = " \t\r\n"
+_DELIMITERS = ",]" + _WHITESPACE
+_DIGITS = "0123456789"
+
+
+async def read_array_prefix(chunks: AsyncIterator[bytes], limit: Optional[int]) -> Any:
+    """Decode a JSON array from a byte stream, stopping after `limit` items.
+
+    Only as much of the body as is needed to produce the first `limit` items is
+    read and decoded. A body that is not a JSON array is decoded in full and
+    returned as is. Raises ValueError on malformed JSON.
+    """
+    text_decoder = codecs.getincrementaldecoder("utf-8")()
+    buf = ""
+    pos = 0
+    exhausted = False
+    items: List[Any] = []
+    started = False
+    after_item = False
+
+    async def more() -> bool:
+        nonlocal buf, pos, exhausted
+        if exhausted:
+            return False
+        try:
+            chunk = await chunks.__anext__()
+        except StopAsyncIteration:
+            exhausted = True
+            buf = buf[pos:] + text_decoder.decode(b"", final=True)
+            pos = 0
+            return False
+        buf = buf[pos:] + text_decoder.decode(chunk)
+        pos = 0
+        return True
+
+    while True:
+        while pos < len(buf) and buf[pos] in _WHITESPACE:
+            pos += 1
+        if pos == len(buf):
+            if await more():
+                continue
+            if not started:
+                return None
+            raise ValueError("Unexpected end of JSON array")
+
+        if not started:
+            if buf[pos] != "[":
+                while await more():
+                    pass
+                return json.loads(buf[pos:])
+            started = True
+            pos += 1
+            continue
+
+        if buf[pos] == "]" and (after_item or not items):
+            return items
+        if after_item:
+            if buf[pos] != ",":
+                raise ValueError(f"Expected ',' or ']' in JSON array, got {buf[pos]!r}")
+            after_item = False
+            pos += 1
+            continue
+        if limit is not None and len(items) >= limit:
+            return items
+
+        try:
+            item, end = _decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError:
+            if await more():
+                continue
+            raise
+        if not exhausted and buf[end - 1] in _DIGITS and (end == len(buf) or buf[end] not in _DELIMITERS):
+            # A number such as `45.5` split as `45.` / `5` decodes early; only
+            # accept a number once it is followed by a delimiter.
+            await more()
+            continue
+        items.append(item)
+        if limit is not None and len(items) >= limit:
+            return items
+        after_item = True
+        pos = end
@@ -0,0 +1,164 @@
+"""Logging setup for the action server.
+
+Records from the `actions` package are put on a queue and written by a
+background listener thread, so a log call never blocks the event loop on I/O.
+`QueueHandler.prepare` still runs in the calling thread: it merges the message
+arguments (and any traceback text) into the message. Redaction and the text or
+JSON formatting run in the listener thread. Configure with environment variables:
+
+- ACTION_LOG_LEVEL: DEBUG, INFO (default), WARNING, ...
+- ACTION_LOG_FORMAT: `text` (default) or `json`
+- ACTION_LOG_DEBUG_SAMPLE_RATE: fraction of DEBUG records kept (default 1.0)
+
+Structured fields are attached with `extra=fields(...)`:
+
+    logger.debug("Validating phone number", extra=fields(phone_number=phone_number))
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import re
+from typing import Any, Dict, Optional, Text
+
+SECRET_KEYS = {"auth_token", "token", "password", "authorization"}
+REDACTED = "***"
+
+_SECRET_PATTERNS = [
+    (re.compile(r"(Bearer\s+)[^\s'\",]+", re.IGNORECASE), r"\1" + REDACTED),
+    (
+        re.compile(r"(['\"]?(?:auth_token|token|password)['\"]?\s*[:=]\s*)(['\"]?)[^\s'\",}&]+\2", re.IGNORECASE),
+        r"\1\2" + REDACTED + r"\2",
+    ),
+]
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional[logging.handlers.QueueHandler] = None
+
+
+def fields(**kwargs: Any) -> Dict[Text, Any]:
+    """Wrap structured fields for the `extra` argument of a logging call."""
+    return {"fields": kwargs}
+
+
+def log_slots(logger: logging.Logger, action_name: Text, slots: Any) -> None:
+    """Log a slot view (see actions.slots) at DEBUG; the dict is only built when enabled."""
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("[%s] Current slots", action_name, extra=fields(slots=slots._asdict()))
+
+
+def redact(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {
+            k: REDACTED if str(k).lower() in SECRET_KEYS and v is not None else redact(v)
+            for k, v in value.items()
+        }
+    if isinstance(value, (list, tuple)):
+        return [redact(v) for v in value]
+    if isinstance(value, str):
+        for pattern, replacement in _SECRET_PATTERNS:
+            value = pattern.sub(replacement, value)
+    return value
+
+
+class RedactingFilter(logging.Filter):
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.msg = redact(record.getMessage())
+        record.args = None
+        if getattr(record, "fields", None):
+            record.fields = redact(record.fields)
+        return True
+
+
+class DebugSamplingFilter(logging.Filter):
+    """Keeps only a fraction of DEBUG records; other levels always pass."""
+
+    def __init__(self, rate: float) -> None:
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno > logging.DEBUG or self.rate >= 1.0 or random.random() < self.rate
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> Text:
+        payload = {
+            "ts": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        payload.update(getattr(record, "fields", None) or {})
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            payload["exc_info"] = record.exc_text
+        return json.dumps(payload, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self) -> None:
+        super().__init__("%(asctime)s - %(levelname)s - %(name)s - %(message)s")
+
+    def format(self, record: logging.LogRecord) -> Text:
+        line = super().format(record)
+        extra = getattr(record, "fields", None)
+        if extra:
+            line += " " + " ".join(f"{k}={v}" for k, v in extra.items())
+        return line
+
+
+def configure_logging(logger_name: Text = "actions") -> None:
+    """Attach the queued handler to `logger_name`. Safe to call more than once."""
+    global _listener, _queue_handler
+    if _listener is not None:
+        return
+
+    level = os.environ.get("ACTION_LOG_LEVEL", "INFO").upper()
+    log_format = os.environ.get("ACTION_LOG_FORMAT", "text").lower()
+    sample_rate = float(os.environ.get("ACTION_LOG_DEBUG_SAMPLE_RATE", "1.0"))
+
+    output = logging.StreamHandler()
+    output.setFormatter(JsonFormatter() if log_format == "json" else TextFormatter())
+    output.addFilter(RedactingFilter())
+
+    records: "queue.Queue[logging.LogRecord]" = queue.Queue(-1)
+    queue_handler = logging.handlers.QueueHandler(records)
+    queue_handler.addFilter(DebugSamplingFilter(sample_rate))
+
+    logger = logging.getLogger(logger_name)
+    logger.setLevel(level)
+    logger.addHandler(queue_handler)
+    logger.propagate = False
+
+    _queue_handler = queue_handler
+    _listener = logging.handlers.QueueListener(records, output, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_stop_listener)
+    if hasattr(os, "register_at_fork"):
+        os.register_at_fork(after_in_child=_restart_listener)
+
+
+def _stop_listener() -> None:
+    if _listener is not None:
+        _listener.stop()
+
+
+def _restart_listener() -> None:
+    """Give a forked worker process its own queue and listener thread.
+
+    With ACTION_SERVER_SANIC_WORKERS > 1 the workers are forked after the actions
+    package was imported; the parent's listener thread does not exist in them.
+    """
+    global _listener
+    if _listener is None or _queue_handler is None:
+        return
+    records: "queue.Queue[logging.LogRecord]" = queue.Queue(-1)
+    _queue_handler.queue = records
+    _listener = logging.handlers.QueueListener(records, *_listener.handlers, respect_handler_level=True)
+    _listener.start()
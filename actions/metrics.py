@@ -0,0 +1,249 @@
+"""Minimal Prometheus text-format metrics for the action server.
+
+Metrics live in one process-wide `REGISTRY` and are served on `/metrics` by the
+`rasa_sdk_plugins` extension. Values that are counted elsewhere (cache stats,
+single-flight stats) are copied in by collector callbacks at scrape time.
+"""
+
+import math
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Text, Tuple
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelValues = Tuple[Text, ...]
+
+
+def _escape(value: Text) -> Text:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[Text], values: Sequence[Text]) -> Text:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(str(value))}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _format_value(value: float) -> Text:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: Text, documentation: Text, labelnames: Sequence[Text] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labels: Dict[Text, Text]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def samples(self) -> List[Text]:
+        raise NotImplementedError
+
+    def render(self) -> List[Text]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ] + self.samples()
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: Text, documentation: Text, labelnames: Sequence[Text] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: Text) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def set(self, value: float, **labels: Text) -> None:
+        """Mirror a count that is maintained outside this registry."""
+        self._values[self._key(labels)] = value
+
+    def value(self, **labels: Text) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> List[Text]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in self._values.items()
+        ]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount: float = 1.0, **labels: Text) -> None:
+        self.inc(-amount, **labels)
+
+    @contextmanager
+    def track_inprogress(self, **labels: Text) -> Iterator[None]:
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: Text,
+        documentation: Text,
+        labelnames: Sequence[Text] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._counts: Dict[LabelValues, List[int]] = {}
+        self._sums: Dict[LabelValues, float] = {}
+
+    def observe(self, value: float, **labels: Text) -> None:
+        key = self._key(labels)
+        counts = self._counts.get(key)
+        if counts is None:
+            counts = self._counts[key] = [0] * len(self.buckets)
+            self._sums[key] = 0.0
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                counts[i] += 1
+                break
+        self._sums[key] += value
+
+    @contextmanager
+    def time(self, **labels: Text) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self) -> List[Text]:
+        lines = []
+        bucket_names = self.labelnames + ("le",)
+        for key, counts in self._counts.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                labels = _format_labels(bucket_names, key + (_format_value(bound),))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(self._sums[key])}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: Dict[Text, _Metric] = {}
+        self._collectors: List[Callable[[], None]] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        existing = self._metrics.get(metric.name)
+        if existing is not None:
+            return existing
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: Text, documentation: Text, labelnames: Sequence[Text] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: Text, documentation: Text, labelnames: Sequence[Text] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: Text,
+        documentation: Text,
+        labelnames: Sequence[Text] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def add_collector(self, collector: Callable[[], None]) -> None:
+        """Register a callback that refreshes metric values right before a scrape."""
+        self._collectors.append(collector)
+
+    def get(self, name: Text) -> Optional[_Metric]:
+        return self._metrics.get(name)
+
+    def render(self) -> Text:
+        for collector in self._collectors:
+            collector()
+        lines: List[Text] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+ACTION_LATENCY = REGISTRY.histogram(
+    "action_server_action_duration_seconds",
+    "Time spent handling a /webhook call, by action and HTTP status.",
+    ["action", "status"],
+)
+ACTION_STAGE_LATENCY = REGISTRY.histogram(
+    "action_server_action_stage_duration_seconds",
+    "Time spent in one stage of an action, e.g. a backend call it waits for.",
+    ["action", "stage"],
+)
+ACTIONS_IN_FLIGHT = REGISTRY.gauge(
+    "action_server_actions_in_flight", "Actions currently being executed.", ["action"]
+)
+ACTION_ERRORS = REGISTRY.counter(
+    "action_server_action_errors_total", "/webhook calls that returned an error status.", ["action", "status"]
+)
+
+UPSTREAM_LATENCY = REGISTRY.histogram(
+    "cls_api_request_duration_seconds",
+    "Latency of CLS API requests, including retries, by endpoint.",
+    ["endpoint"],
+)
+UPSTREAM_RESPONSES = REGISTRY.counter(
+    "cls_api_responses_total",
+    "CLS API responses by endpoint and HTTP status (417 means no call history).",
+    ["endpoint", "status"],
+)
+UPSTREAM_ERRORS = REGISTRY.counter(
+    "cls_api_errors_total", "CLS API requests that failed without a response.", ["endpoint", "error"]
+)
+UPSTREAM_IN_FLIGHT = REGISTRY.gauge(
+    "cls_api_requests_in_flight", "CLS API requests currently in flight.", ["endpoint"]
+)
+UPSTREAM_CIRCUIT_OPEN = REGISTRY.gauge(
+    "cls_api_circuit_open", "1 while the CLS API circuit breaker is failing fast, else 0."
+)
+UPSTREAM_COALESCED = REGISTRY.counter(
+    "cls_api_coalesced_calls_total",
+    "Callers that joined an identical in-flight CLS request instead of sending their own.",
+    ["endpoint"],
+)
+AUTHENTICATIONS = REGISTRY.counter(
+    "cls_api_authentications_total", "Calls made to the CLS authenticate endpoint."
+)
+
+CACHE_HITS = REGISTRY.counter("action_server_cache_hits_total", "Cache hits.", ["cache"])
+CACHE_MISSES = REGISTRY.counter("action_server_cache_misses_total", "Cache misses.", ["cache"])
+CACHE_HIT_RATIO = REGISTRY.gauge(
+    "action_server_cache_hit_ratio", "Cache hits divided by lookups since start.", ["cache"]
+)
+CACHE_SIZE = REGISTRY.gauge("action_server_cache_entries", "Entries currently cached.", ["cache"])
+
+
+def record_cache_stats(cache: Text, stats: Dict[Text, float]) -> None:
+    hits, misses = stats.get("hits", 0), stats.get("misses", 0)
+    CACHE_HITS.set(hits, cache=cache)
+    CACHE_MISSES.set(misses, cache=cache)
+    CACHE_HIT_RATIO.set(hits / (hits + misses) if hits + misses else 0.0, cache=cache)
+    CACHE_SIZE.set(stats.get("size", 0), cache=cache)
@@ -0,0 +1,122 @@
+"""Catalogue of the packages offered by action_present_packages.
+
+Packages are read from packages.yml and indexed by id, and the carousel
+attachment and its JSON body are built once per load. The body is versioned by
+its hash, which the action server's GET /packages sends as ETag:
+
+    package = catalogue.get("b")
+    dispatcher.utter_message(attachment=catalogue.attachment())
+
+The file is checked for changes at most every `reload_interval` seconds and
+reloaded in place. A file that fails to load is logged and the previous
+catalogue is kept.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, List, NamedTuple, Optional, Text, Tuple
+
+import yaml
+
+from actions.config import PackagesConfig, load_packages_config
+
+logger = logging.getLogger(__name__)
+
+
+class Package(NamedTuple):
+    id: Text
+    title: Text
+    details: Text
+
+
+def parse_packages(data: Any) -> List[Package]:
+    packages = []
+    for entry in (data or {}).get("packages") or []:
+        package = Package(str(entry["id"]).strip().upper(), str(entry["title"]), str(entry.get("details", "")))
+        if not package.id or any(p.id == package.id for p in packages):
+            raise ValueError(f"Package id {package.id!r} is empty or not unique")
+        packages.append(package)
+    if not packages:
+        raise ValueError("The package catalogue is empty")
+    return packages
+
+
+class PackageCatalogue:
+    def __init__(self, path: Text, public_url: Optional[Text] = None, reload_interval: float = 10.0) -> None:
+        self.path = path
+        self.public_url = public_url
+        self.reload_interval = reload_interval
+
+        self.packages: Tuple[Package, ...] = ()
+        self.version = ""
+        self.body = b""
+        self._by_id: Dict[Text, Package] = {}
+        self._attachment: Dict[Text, Any] = {}
+        self._mtime: Optional[int] = None
+        self._checked_at = 0.0
+
+        self.reloads = 0
+        self.reload_failures = 0
+        self.load()
+
+    @classmethod
+    def from_config(cls, config: PackagesConfig) -> "PackageCatalogue":
+        return cls(config.path, config.public_url, config.reload_interval)
+
+    def load(self) -> None:
+        """Read the catalogue file. Errors are raised to the caller."""
+        mtime = os.stat(self.path).st_mtime_ns
+        with open(self.path, encoding="utf-8") as f:
+            packages = parse_packages(yaml.safe_load(f))
+
+        payload = [package._asdict() for package in packages]
+        body = json.dumps({"packages": payload}, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        version = hashlib.sha256(body).hexdigest()[:16]
+        attachment: Dict[Text, Any] = {"type": "carousel", "version": version}
+        if self.public_url:
+            attachment["url"] = f"{self.public_url}?v={version}"
+        else:
+            attachment["packages"] = payload
+
+        self.packages = tuple(packages)
+        self._by_id = {package.id: package for package in packages}
+        self.body = body
+        self.version = version
+        self._attachment = attachment
+        self._mtime = mtime
+        self._checked_at = time.monotonic()
+        self.reloads += 1
+        logger.info("Loaded %d packages from %s (version %s)", len(packages), self.path, version)
+
+    def reload_if_changed(self) -> None:
+        now = time.monotonic()
+        if now - self._checked_at < self.reload_interval:
+            return
+        self._checked_at = now
+        try:
+            if os.stat(self.path).st_mtime_ns != self._mtime:
+                self.load()
+        except (OSError, ValueError, KeyError, TypeError, yaml.YAMLError) as e:
+            self.reload_failures += 1
+            logger.error("Could not reload the package catalogue from %s, keeping version %s: %s",
+                         self.path, self.version, e)
+
+    def get(self, package_id: Any) -> Optional[Package]:
+        self.reload_if_changed()
+        return self._by_id.get(str(package_id).strip().upper())
+
+    def attachment(self) -> Dict[Text, Any]:
+        """Carousel attachment for the current version; callers must not modify it."""
+        self.reload_if_changed()
+        return self._attachment
+
+    def current(self) -> Tuple[Text, bytes]:
+        """Version and serialized JSON body of the catalogue."""
+        self.reload_if_changed()
+        return self.version, self.body
+
+
+catalogue = PackageCatalogue.from_config(load_packages_config())
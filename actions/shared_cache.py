@@ -0,0 +1,139 @@
+"""Cache shared by all action server worker processes, backed by Redis.
+
+With ACTION_SERVER_SANIC_WORKERS > 1 rasa_sdk runs several worker processes,
+each with its own customer directory, CLS token and call-history cache. When a
+`shared_cache` URL is configured the workers publish what they fetched from the
+CLS API here, so the upstream is called once per refresh instead of once per
+worker. Without a URL every method is a no-op and the caches stay per process.
+
+Redis problems are logged and treated as cache misses; they never fail a turn.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Text, Union
+
+from redis import asyncio as aioredis
+from redis.exceptions import LockError, RedisError
+
+from actions.config import SharedCacheConfig, load_shared_cache_config
+
+logger = logging.getLogger(__name__)
+
+LOCK_POLL_INTERVAL = 0.05
+
+
+class SharedCache:
+    def __init__(self, config: SharedCacheConfig) -> None:
+        self.url = config.url
+        self.prefix = config.prefix
+        self.lock_timeout = config.lock_timeout
+        self._client: Optional[aioredis.Redis] = None
+
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self.waits = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.url is not None
+
+    def _get_client(self) -> aioredis.Redis:
+        # Created lazily so each forked worker opens its own connections on its
+        # own event loop.
+        if self._client is None:
+            self._client = aioredis.from_url(self.url)
+        return self._client
+
+    def _key(self, key: Text) -> Text:
+        return f"{self.prefix}{key}"
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+
+    async def get(self, key: Text) -> Optional[Any]:
+        if not self.enabled:
+            return None
+        try:
+            raw = await self._get_client().get(self._key(key))
+        except RedisError as e:
+            self.errors += 1
+            logger.warning("Shared cache read of %s failed: %s", key, e)
+            return None
+        if raw is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(raw)
+
+    async def set(self, key: Text, value: Any, ttl: float) -> None:
+        if not self.enabled or ttl <= 0:
+            return
+        try:
+            await self._get_client().set(self._key(key), json.dumps(value), px=int(ttl * 1000))
+        except RedisError as e:
+            self.errors += 1
+            logger.warning("Shared cache write of %s failed: %s", key, e)
+
+    async def fill(
+        self,
+        key: Text,
+        fetch: Callable[[], Awaitable[Any]],
+        ttl: Union[float, Callable[[Any], float]],
+    ) -> Any:
+        """Run `fetch` in at most one worker at a time and share its result.
+
+        The worker holding the lock for `key` fetches and stores the value; the
+        others wait for the lock to be released and read what it stored. If
+        that does not work out (the holder failed or the wait timed out) a
+        worker falls back to fetching by itself.
+        """
+        if not self.enabled:
+            return await fetch()
+
+        lock = self._get_client().lock(self._key(f"lock:{key}"), timeout=self.lock_timeout)
+        try:
+            acquired = await lock.acquire(blocking=False)
+        except RedisError as e:
+            self.errors += 1
+            logger.warning("Shared cache lock for %s failed: %s", key, e)
+            return await fetch()
+
+        if not acquired:
+            self.waits += 1
+            value = await self._wait_for(key, lock)
+            if value is not None:
+                return value
+            return await fetch()
+
+        try:
+            value = await fetch()
+            await self.set(key, value, ttl(value) if callable(ttl) else ttl)
+            return value
+        finally:
+            try:
+                await lock.release()
+            except (LockError, RedisError) as e:
+                logger.debug("Shared cache lock for %s was not released: %s", key, e)
+
+    async def _wait_for(self, key: Text, lock: Any) -> Optional[Any]:
+        deadline = time.monotonic() + self.lock_timeout
+        try:
+            while await lock.locked() and time.monotonic() < deadline:
+                await asyncio.sleep(LOCK_POLL_INTERVAL)
+        except RedisError as e:
+            self.errors += 1
+            logger.warning("Shared cache wait for %s failed: %s", key, e)
+            return None
+        return await self.get(key)
+
+    def stats(self) -> Dict[Text, int]:
+        return {"hits": self.hits, "misses": self.misses, "errors": self.errors, "waits": self.waits}
+
+
+shared_cache = SharedCache(load_shared_cache_config())
@@ -0,0 +1,60 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Text
+
+logger = logging.getLogger(__name__)
+
+
+class FlightStats:
+    def __init__(self) -> None:
+        self.calls = 0
+        self.executions = 0
+
+    @property
+    def deduplicated(self) -> int:
+        return self.calls - self.executions
+
+    def as_dict(self) -> Dict[Text, int]:
+        return {"calls": self.calls, "executions": self.executions, "deduplicated": self.deduplicated}
+
+
+class SingleFlight:
+    """Coalesces concurrent calls that share a key into one execution.
+
+    The first caller for a key starts the work; callers arriving while it is
+    still running await the same result (or exception). Cancelling one caller
+    does not cancel the shared call for the others.
+    """
+
+    def __init__(self) -> None:
+        self._inflight: Dict[Hashable, "asyncio.Future[Any]"] = {}
+        self._stats: Dict[Text, FlightStats] = {}
+
+    async def do(
+        self,
+        key: Hashable,
+        fn: Callable[[], Awaitable[Any]],
+        label: Optional[Text] = None,
+    ) -> Any:
+        stats = self._stats.setdefault(label or str(key), FlightStats())
+        stats.calls += 1
+
+        future = self._inflight.get(key)
+        if future is None:
+            stats.executions += 1
+            future = asyncio.ensure_future(fn())
+            self._inflight[key] = future
+            future.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            logger.debug("Joining in-flight call for %s", label or key)
+        return await asyncio.shield(future)
+
+    def _forget(self, key: Hashable, future: "asyncio.Future[Any]") -> None:
+        if self._inflight.get(key) is future:
+            del self._inflight[key]
+
+    def inflight(self) -> int:
+        return len(self._inflight)
+
+    def stats(self) -> Dict[Text, Dict[Text, int]]:
+        return {label: stats.as_dict() for label, stats in self._stats.items()}
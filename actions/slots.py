@@ -0,0 +1,48 @@
+"""Typed, read-only views of the slots an action uses.
+
+An action declares the slots it reads as a NamedTuple and gets them with
+`read_slots`, which looks up only those slots. Debug logs then show just those
+slots instead of every slot in the tracker:
+
+    slots = read_slots(tracker, CallHistorySlots)
+    slots.customer_id
+"""
+
+from typing import NamedTuple, Optional, Text, Type, TypeVar
+
+from rasa_sdk import Tracker
+
+V = TypeVar("V", bound=tuple)
+
+
+def read_slots(tracker: Tracker, view: Type[V]) -> V:
+    return view._make(map(tracker.slots.get, view._fields))
+
+
+class ConversationSlots(NamedTuple):
+    name: Optional[Text]
+    current_question: Optional[Text]
+
+
+class PhoneFormSlots(NamedTuple):
+    requested_slot: Optional[Text]
+    phone_number: Optional[Text]
+    customer_id: Optional[Text]
+
+
+class CreditSlots(NamedTuple):
+    credit_balance: Optional[float]
+    name: Optional[Text]
+    current_question: Optional[Text]
+    backend_unavailable: Optional[bool]
+
+
+class CallHistorySlots(NamedTuple):
+    phone_number: Optional[Text]
+    customer_id: Optional[Text]
+    name: Optional[Text]
+
+
+class PackageSlots(NamedTuple):
+    package_choice: Optional[Text]
+    current_question: Optional[Text]
@@ -0,0 +1,114 @@
+"""Reply templates for the custom actions, loaded once from actions/templates.yml.
+
+The templates are kept out of the domain's `responses`, so Rasa does not treat
+them as actions it can predict, or pick a variation at random. A template can
+have several variations that differ in the placeholders they use, e.g. one with
+`{name}` and one without; `render` picks the variation with the most
+placeholders that all have a value:
+
+    templates.render("utter_credit_zero", name=name)
+
+Each variation is parsed once at startup for its placeholders, so rendering is
+a check of those placeholders and a `str.format_map`.
+"""
+
+import logging
+import os
+from string import Formatter
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Text, Tuple
+
+import yaml
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TEMPLATES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates.yml")
+
+EMPTY = (None, "")
+
+
+def _parse(text: Text) -> Tuple[Tuple[Text, ...], Text]:
+    """The placeholders of `text`, in order, and `text` with them made positional.
+
+    `{name}, your credit is SAR {credit}.` gives `("name", "credit")` and
+    `{0}, your credit is SAR {1}.`, which `render_lines` formats with a value
+    per placeholder.
+    """
+    order: List[Text] = []
+    parts = []
+    for literal, field, spec, conversion in Formatter().parse(text):
+        parts.append(literal.replace("{", "{{").replace("}", "}}"))
+        if field is None:
+            continue
+        if not field.isidentifier():
+            raise ValueError(f"Placeholder {{{field}}} in {text!r} is not a plain name")
+        if field not in order:
+            order.append(field)
+        parts.append("{%d%s%s}" % (
+            order.index(field), "!" + conversion if conversion else "", ":" + spec if spec else ""
+        ))
+    return tuple(order), "".join(parts)
+
+
+class Template:
+    """A template's variations, most placeholders first."""
+
+    __slots__ = ("name", "variations", "row_fields", "row_format")
+
+    def __init__(self, name: Text, texts: List[Text]) -> None:
+        variations = [(_parse(text)[0], text) for text in texts]
+        variations.sort(key=lambda v: len(v[0]), reverse=True)
+        self.name = name
+        self.variations: List[Tuple[Tuple[Text, ...], Text]] = variations
+        self.row_fields, positional = _parse(variations[0][1])
+        self.row_format = positional.format
+
+    def render(self, values: Mapping[Text, Any]) -> Text:
+        for fields, text in self.variations:
+            for field in fields:
+                if values.get(field) in EMPTY:
+                    break
+            else:
+                return text.format_map(values)
+        available = sorted(k for k, v in values.items() if v not in EMPTY)
+        raise ValueError(f"No variation of {self.name} can be rendered with {available}")
+
+    def render_row(self, row: Mapping[Text, Any], default: Any) -> Text:
+        return self.row_format(*[row.get(field, default) for field in self.row_fields])
+
+
+class TemplateLibrary:
+    def __init__(self, templates: Mapping[Text, List[Dict[Text, Any]]]) -> None:
+        self._templates: Dict[Text, Template] = {}
+        for name, variations in templates.items():
+            texts = [v["text"] for v in variations or [] if isinstance(v, dict) and "text" in v]
+            if texts:
+                self._templates[name] = Template(name, texts)
+
+    @classmethod
+    def from_file(cls, path: Optional[Text] = None) -> "TemplateLibrary":
+        path = path or os.environ.get("ACTION_TEMPLATES_PATH", DEFAULT_TEMPLATES_PATH)
+        with open(path, encoding="utf-8") as f:
+            templates = (yaml.safe_load(f) or {}).get("templates") or {}
+        library = cls(templates)
+        logger.debug("Loaded %d reply templates from %s", len(library), path)
+        return library
+
+    def __len__(self) -> int:
+        return len(self._templates)
+
+    def __contains__(self, name: Text) -> bool:
+        return name in self._templates
+
+    def missing(self, names: Iterable[Text]) -> List[Text]:
+        return [name for name in names if name not in self._templates]
+
+    def render(self, template: Text, **values: Any) -> Text:
+        return self._templates[template].render(values)
+
+    def render_lines(self, template: Text, rows: Iterable[Mapping[Text, Any]], default: Any = "N/A") -> Text:
+        """Render `template` once per row, one per line; absent row keys become `default`."""
+        render_row = self._templates[template].render_row
+        return "\n".join([render_row(row, default) for row in rows])
+
+
+templates = TemplateLibrary.from_file()
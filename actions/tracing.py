@@ -0,0 +1,302 @@
+"""Per-turn tracing across the chat widget, the Rasa server, the action server and the CLS API.
+
+The widget creates a trace id for every user message and sends it as message
+metadata (`{"trace_id": ...}`). The Rasa server (see addons.channels) and the
+action server record spans under that id:
+
+- Rasa server: the turn, NLU parsing, policy prediction and each action run,
+  which for custom actions includes the /webhook call to the action server
+- action server: each action, its stages and every CLS API request
+
+Outbound CLS API requests carry the current span in `traceparent` (W3C) and
+`X-B3-*` (Zipkin) headers, so the CLS API can join the trace.
+
+Spans are written in Zipkin v2 JSON by a background thread, one per line to
+TRACE_FILE, and/or posted in batches to a Zipkin-compatible collector at
+TRACE_COLLECTOR_URL (e.g. http://localhost:9411/api/v2/spans). Tracing is off
+unless one of them is set. Summarize a trace file with
+
+    python -m actions.tracing traces.jsonl --top 5
+"""
+
+import argparse
+import atexit
+import json
+import logging
+import os
+import queue
+import re
+import statistics
+import threading
+import time
+import urllib.request
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from typing import Any, Dict, Iterator, List, Optional, Text, Tuple
+
+logger = logging.getLogger(__name__)
+
+TRACE_ID = re.compile(r"^[0-9a-f]{32}$")
+
+_current: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+_exporter: Optional["SpanExporter"] = None
+
+
+def new_trace_id() -> Text:
+    return uuid.uuid4().hex
+
+
+def valid_trace_id(value: Any) -> Optional[Text]:
+    """`value` if it is a trace id as the widget creates them, else None."""
+    if isinstance(value, str) and TRACE_ID.match(value):
+        return value
+    return None
+
+
+class Span:
+    __slots__ = ("trace_id", "id", "parent_id", "name", "tags", "timestamp", "duration", "_started")
+
+    def __init__(self, name: Text, trace_id: Text, parent_id: Optional[Text], tags: Dict[Text, Any]) -> None:
+        self.trace_id = trace_id
+        self.id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.name = name
+        self.tags = tags
+        self.timestamp = time.time()
+        self.duration: Optional[float] = None
+        self._started = time.perf_counter()
+
+    def finish(self) -> None:
+        self.duration = time.perf_counter() - self._started
+
+    def to_zipkin(self, service_name: Text) -> Dict[Text, Any]:
+        record = {
+            "traceId": self.trace_id,
+            "id": self.id,
+            "name": self.name,
+            "timestamp": int(self.timestamp * 1e6),
+            "duration": max(1, int((self.duration or 0.0) * 1e6)),
+            "localEndpoint": {"serviceName": service_name},
+            "tags": {k: str(v) for k, v in self.tags.items() if v is not None},
+        }
+        if self.parent_id:
+            record["parentId"] = self.parent_id
+        return record
+
+
+def start_span(name: Text, trace_id: Optional[Text] = None, **tags: Any) -> Tuple[Optional[Span], Optional[Token]]:
+    """Start a span as the current one; pass the result to `end_span`. (None, None) if tracing is off.
+
+    Without a `trace_id` the span joins the current span's trace, or starts a new one.
+    The `action` tag is inherited from the parent span.
+    """
+    if _exporter is None:
+        return None, None
+    parent = _current.get()
+    if parent is not None and "action" in parent.tags:
+        tags.setdefault("action", parent.tags["action"])
+    s = Span(
+        name,
+        trace_id or (parent.trace_id if parent else new_trace_id()),
+        parent.id if parent and (trace_id is None or trace_id == parent.trace_id) else None,
+        tags,
+    )
+    return s, _current.set(s)
+
+
+def end_span(s: Optional[Span], token: Optional[Token], **tags: Any) -> None:
+    if s is None:
+        return
+    s.finish()
+    s.tags.update(tags)
+    try:
+        _current.reset(token)
+    except ValueError:
+        # Ended in a different context than it was started in (e.g. another task).
+        pass
+    if _exporter is not None:
+        _exporter.export(s)
+
+
+@contextmanager
+def span(name: Text, trace_id: Optional[Text] = None, **tags: Any) -> Iterator[Optional[Span]]:
+    s, token = start_span(name, trace_id, **tags)
+    if s is None:
+        yield None
+        return
+    try:
+        yield s
+    except BaseException as e:
+        s.tags["error"] = type(e).__name__
+        raise
+    finally:
+        end_span(s, token)
+
+
+def trace_headers() -> Dict[Text, Text]:
+    """Headers that propagate the current span to an outbound request; empty if there is none."""
+    s = _current.get()
+    if s is None:
+        return {}
+    return {
+        "traceparent": f"00-{s.trace_id}-{s.id}-01",
+        "X-B3-TraceId": s.trace_id,
+        "X-B3-SpanId": s.id,
+        "X-B3-Sampled": "1",
+    }
+
+
+class SpanExporter:
+    """Writes finished spans from a background thread, so tracing never blocks the event loop."""
+
+    def __init__(
+        self,
+        service_name: Text,
+        path: Optional[Text] = None,
+        collector_url: Optional[Text] = None,
+        batch_size: int = 100,
+        flush_interval: float = 5.0,
+    ) -> None:
+        self.service_name = service_name
+        self.path = path
+        self.collector_url = collector_url
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self._start()
+
+    def _start(self) -> None:
+        self._queue: "queue.Queue[Optional[Span]]" = queue.Queue(maxsize=100000)
+        self._thread = threading.Thread(target=self._run, name="span-exporter", daemon=True)
+        self._thread.start()
+
+    def export(self, s: Span) -> None:
+        try:
+            self._queue.put_nowait(s)
+        except queue.Full:
+            self.dropped += 1
+
+    def stop(self) -> None:
+        self._queue.put(None)
+        self._thread.join(timeout=self.flush_interval)
+
+    def restart(self) -> None:
+        """Start a new writer thread in a forked worker process; the parent's is gone."""
+        self._start()
+
+    def _run(self) -> None:
+        # Line buffered, so each span is one write and forked workers can share the file.
+        out = open(self.path, "a", encoding="utf-8", buffering=1) if self.path else None
+        batch: List[Dict[Text, Any]] = []
+        flushed_at = time.monotonic()
+        try:
+            while True:
+                try:
+                    s = self._queue.get(timeout=self.flush_interval)
+                except queue.Empty:
+                    s = False
+                if s is None:
+                    break
+                if s:
+                    record = s.to_zipkin(self.service_name)
+                    if out is not None:
+                        out.write(json.dumps(record) + "\n")
+                    if self.collector_url:
+                        batch.append(record)
+                if batch and (len(batch) >= self.batch_size or time.monotonic() - flushed_at >= self.flush_interval):
+                    self._post(batch)
+                    batch = []
+                    flushed_at = time.monotonic()
+        finally:
+            if batch:
+                self._post(batch)
+            if out is not None:
+                out.close()
+
+    def _post(self, batch: List[Dict[Text, Any]]) -> None:
+        request = urllib.request.Request(
+            self.collector_url,
+            data=json.dumps(batch).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=5):
+                pass
+        except Exception as e:
+            logger.warning("Could not send %d spans to %s: %s", len(batch), self.collector_url, e)
+
+
+def configure_tracing(service_name: Text) -> bool:
+    """Start exporting spans if TRACE_FILE or TRACE_COLLECTOR_URL is set. Safe to call more than once."""
+    global _exporter
+    if _exporter is not None:
+        return True
+    path = os.environ.get("TRACE_FILE") or None
+    collector_url = os.environ.get("TRACE_COLLECTOR_URL") or None
+    if not path and not collector_url:
+        return False
+    _exporter = SpanExporter(os.environ.get("TRACE_SERVICE_NAME", service_name), path, collector_url)
+    atexit.register(_exporter.stop)
+    if hasattr(os, "register_at_fork"):
+        os.register_at_fork(after_in_child=_exporter.restart)
+    return True
+
+
+def load_spans(paths: List[Text]) -> List[Dict[Text, Any]]:
+    spans = []
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    spans.append(json.loads(line))
+    return spans
+
+
+def summarize(spans: List[Dict[Text, Any]], top: int) -> Dict[Text, Any]:
+    """Per action: latency of each span name, and its `top` slowest spans with their trace ids."""
+    by_action: Dict[Text, List[Dict[Text, Any]]] = defaultdict(list)
+    for s in spans:
+        by_action[s.get("tags", {}).get("action", "(turn)")].append(s)
+
+    summary = {}
+    for action, action_spans in sorted(by_action.items()):
+        durations: Dict[Text, List[float]] = defaultdict(list)
+        for s in action_spans:
+            durations[(s["localEndpoint"]["serviceName"], s["name"])].append(s["duration"] / 1000)
+        names = {}
+        for (service, name), ms in sorted(durations.items(), key=lambda item: -max(item[1])):
+            ms.sort()
+            names[f"{service} {name}"] = {
+                "count": len(ms),
+                "p50_ms": round(statistics.median(ms), 1),
+                "p95_ms": round(ms[int(0.95 * (len(ms) - 1))], 1),
+                "max_ms": round(ms[-1], 1),
+            }
+        slowest = sorted(action_spans, key=lambda s: -s["duration"])[:top]
+        summary[action] = {
+            "spans": names,
+            "slowest": [
+                {"name": s["name"], "ms": round(s["duration"] / 1000, 1), "trace_id": s["traceId"]} for s in slowest
+            ],
+        }
+    return summary
+
+
+def create_argument_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Summarize the slowest spans per action in trace files")
+    parser.add_argument("files", nargs="+", help="TRACE_FILE outputs of the Rasa and action servers")
+    parser.add_argument("--top", type=int, default=5, help="Slowest spans listed per action")
+    parser.add_argument("--trace-id", help="Only the spans of this trace")
+    return parser
+
+
+if __name__ == "__main__":
+    cli_args = create_argument_parser().parse_args()
+    all_spans = load_spans(cli_args.files)
+    if cli_args.trace_id:
+        all_spans = [s for s in all_spans if s["traceId"] == cli_args.trace_id]
+    print(json.dumps(summarize(all_spans, cli_args.top), indent=2))
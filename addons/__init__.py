@@ -0,0 +1,5 @@
+"""Custom components and tooling for the Rasa server.
+
+Components are referenced by module path from endpoints.production.yml, config.yml and
+credentials.yml, so start the Rasa server from the project root.
+"""
@@ -0,0 +1,116 @@
+"""Input channels that carry the chat widget's trace id into the Rasa server.
+
+Referenced from credentials.yml instead of the built-in `rest` and `socketio`
+channels; they keep the same names, so the webhook URLs do not change:
+
+    addons.channels.TracingRestInput:
+    addons.channels.TracingSocketIOInput:
+      user_message_evt: user_uttered
+      ...
+    addons.channels.MetricsInput:
+
+`MetricsInput` receives no messages; it serves the Rasa server's metrics (see
+addons.metrics) on GET /webhooks/metrics/ for Prometheus.
+
+The socket.io channel already passes message metadata on; the REST channel
+does not, so `TracingRestInput` reads it from the request body. Importing this
+module also instruments the message processor (see `instrument_processor`)
+when tracing is configured, see actions.tracing.
+"""
+
+import functools
+import inspect
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional, Text, Tuple
+
+from rasa.core.channels.channel import InputChannel, UserMessage
+from rasa.core.channels.rest import RestInput
+from rasa.core.channels.socketio import SocketIOInput
+from rasa.core.processor import MessageProcessor
+from sanic import Blueprint, response
+from sanic.request import Request
+from sanic.response import HTTPResponse
+
+from actions.tracing import configure_tracing, span, valid_trace_id
+from addons.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+# Returns the span name and tags for a call of the instrumented method.
+Describe = Callable[..., Tuple[Text, Dict[Text, Any]]]
+
+
+def _trace(cls: type, method_name: Text, describe: Describe) -> None:
+    method = getattr(cls, method_name, None)
+    if method is None:
+        logger.warning("%s.%s not found, it is not traced in this Rasa version", cls.__name__, method_name)
+        return
+
+    if inspect.iscoroutinefunction(method):
+        @functools.wraps(method)
+        async def traced(self: Any, *args: Any, **kwargs: Any) -> Any:
+            name, tags = describe(*args, **kwargs)
+            with span(name, **tags):
+                return await method(self, *args, **kwargs)
+    else:
+        @functools.wraps(method)
+        def traced(self: Any, *args: Any, **kwargs: Any) -> Any:
+            name, tags = describe(*args, **kwargs)
+            with span(name, **tags):
+                return method(self, *args, **kwargs)
+
+    setattr(cls, method_name, traced)
+
+
+def _turn(message: Any, *_: Any, **__: Any) -> Tuple[Text, Dict[Text, Any]]:
+    # The turn's span starts the widget's trace; without a valid id a new one is started.
+    trace_id = valid_trace_id((message.metadata or {}).get("trace_id"))
+    return "rasa.turn", {"trace_id": trace_id, "channel": message.input_channel}
+
+
+def _action(action: Any, *_: Any, **__: Any) -> Tuple[Text, Dict[Text, Any]]:
+    return f"rasa.action:{action.name()}", {"action": action.name()}
+
+
+def instrument_processor() -> None:
+    """Record a span per turn, NLU parse, policy prediction and action run."""
+    if getattr(MessageProcessor, "_traced", False):
+        return
+    MessageProcessor._traced = True
+    _trace(MessageProcessor, "handle_message", _turn)
+    _trace(MessageProcessor, "parse_message", lambda *_, **__: ("rasa.parse_message", {}))
+    _trace(MessageProcessor, "_predict_next_with_tracker", lambda *_, **__: ("rasa.predict", {}))
+    _trace(MessageProcessor, "_run_action", _action)
+
+
+class TracingRestInput(RestInput):
+    """The REST channel, passing the `metadata` of the request body on with the message."""
+
+    def get_metadata(self, request: Request) -> Optional[Dict[Text, Any]]:
+        metadata = (request.json or {}).get("metadata")
+        return metadata if isinstance(metadata, dict) else None
+
+
+class TracingSocketIOInput(SocketIOInput):
+    """The socket.io channel; exists so the processor is instrumented when only it is used."""
+
+
+class MetricsInput(InputChannel):
+    """Serves the Rasa server's metrics in Prometheus text format on GET /webhooks/metrics/."""
+
+    @classmethod
+    def name(cls) -> Text:
+        return "metrics"
+
+    def blueprint(self, on_new_message: Callable[[UserMessage], Awaitable[Any]]) -> Blueprint:
+        metrics = Blueprint("metrics_webhook", __name__)
+
+        @metrics.route("/", methods=["GET"])
+        async def scrape(_: Request) -> HTTPResponse:
+            return response.text(REGISTRY.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+        return metrics
+
+
+if configure_tracing("rasa"):
+    instrument_processor()
@@ -0,0 +1,165 @@
+"""Fast path for messages whose intent is fixed by their form.
+
+Bare phone numbers, package letters and one-word yes/no answers make up a large
+share of the turns in this bot, yet each was classified by DIETClassifier and
+ResponseSelector. `FastPathClassifier` recognises them with compiled patterns
+and sets the intent and entities itself; `FastPathDIETClassifier` and
+`FastPathResponseSelector` then skip those messages. In config.yml:
+
+    pipeline:
+    - name: addons.fast_path.FastPathClassifier
+    - name: WhitespaceTokenizer
+    ...
+    - name: addons.fast_path.FastPathDIETClassifier
+    ...
+    - name: addons.fast_path.FastPathResponseSelector
+
+Anything that does not match a pattern exactly goes through the ML pipeline as
+before. A matched message's parse data has `fast_path` set to the rule name.
+How often each rule matched is counted in `nlu_fast_path_messages_total`,
+served on the Rasa server's GET /webhooks/metrics/ (see addons.metrics), and
+logged every `log_every` messages.
+"""
+
+import logging
+import re
+from typing import Any, Dict, List, Optional, Pattern, Text, Tuple
+
+from rasa.engine.graph import ExecutionContext, GraphComponent
+from rasa.engine.recipes.default_recipe import DefaultV1Recipe
+from rasa.engine.storage.resource import Resource
+from rasa.engine.storage.storage import ModelStorage
+from rasa.nlu.classifiers.diet_classifier import DIETClassifier
+from rasa.nlu.selectors.response_selector import ResponseSelector
+from rasa.shared.nlu.constants import ENTITIES, INTENT, INTENT_RANKING_KEY, TEXT
+from rasa.shared.nlu.training_data.message import Message
+from rasa.shared.nlu.training_data.training_data import TrainingData
+
+from addons.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+FAST_PATH = "fast_path"
+
+FAST_PATH_MESSAGES = REGISTRY.counter(
+    "nlu_fast_path_messages_total",
+    "Messages parsed, by the fast path rule that classified them ('none' for the ML pipeline).",
+    ["rule"],
+)
+
+# Matched with `fullmatch` against the message text without its surrounding
+# whitespace, so entity offsets are offsets into the original text.
+# The same format validate_phone_number accepts, so a matched number is valid.
+PHONE_NUMBER = re.compile(r"\d{10,12}")
+PACKAGE_CHOICE = re.compile(r"(?:package\s+|plan\s+)?([abc])[.!]?", re.IGNORECASE)
+AFFIRM = re.compile(r"(?:yes|yeah|yep|yup|sure|okay|ok|alright|definitely|yes please)[.!]?", re.IGNORECASE)
+DENY = re.compile(r"(?:no|nope|nah|never|no thanks|no way|not really)[.!]?", re.IGNORECASE)
+
+
+def _entity(entity: Text, value: Text, start: int, end: int) -> Dict[Text, Any]:
+    return {"entity": entity, "value": value, "start": start, "end": end, "extractor": "FastPathClassifier"}
+
+
+def _phone_number(match: re.Match) -> List[Dict[Text, Any]]:
+    return [_entity("phone_number", match.group(0), match.start(), match.end())]
+
+
+def _package_choice(match: re.Match) -> List[Dict[Text, Any]]:
+    return [_entity("package_choice", match.group(1).upper(), match.start(1), match.end(1))]
+
+
+def _no_entities(_: re.Match) -> List[Dict[Text, Any]]:
+    return []
+
+
+RULES: List[Tuple[Text, Pattern, Text, Any]] = [
+    ("phone_number", PHONE_NUMBER, "provide_phone_number", _phone_number),
+    ("package_choice", PACKAGE_CHOICE, "choose_package", _package_choice),
+    ("affirm", AFFIRM, "affirm", _no_entities),
+    ("deny", DENY, "deny", _no_entities),
+]
+
+
+def is_fast_path(message: Message) -> bool:
+    return message.get(FAST_PATH) is not None
+
+
+@DefaultV1Recipe.register(
+    [DefaultV1Recipe.ComponentType.INTENT_CLASSIFIER, DefaultV1Recipe.ComponentType.ENTITY_EXTRACTOR],
+    is_trainable=False,
+)
+class FastPathClassifier(GraphComponent):
+    @staticmethod
+    def get_default_config() -> Dict[Text, Any]:
+        return {"log_every": 1000}
+
+    def __init__(self, config: Dict[Text, Any]) -> None:
+        self.log_every = int(config["log_every"])
+        self._parsed = 0
+
+    @classmethod
+    def create(
+        cls,
+        config: Dict[Text, Any],
+        model_storage: ModelStorage,
+        resource: Resource,
+        execution_context: ExecutionContext,
+    ) -> "FastPathClassifier":
+        return cls(config)
+
+    def process_training_data(self, training_data: TrainingData) -> TrainingData:
+        return training_data
+
+    def process(self, messages: List[Message]) -> List[Message]:
+        for message in messages:
+            rule = self.classify(message)
+            FAST_PATH_MESSAGES.inc(rule=rule or "none")
+            self._parsed += 1
+            if self.log_every and self._parsed % self.log_every == 0:
+                self._log_counts()
+        return messages
+
+    def classify(self, message: Message) -> Optional[Text]:
+        text = message.get(TEXT) or ""
+        start, end = len(text) - len(text.lstrip()), len(text.rstrip())
+        for rule, pattern, intent, entities in RULES:
+            match = pattern.fullmatch(text, start, end)
+            if match is None:
+                continue
+            message.set(INTENT, {"name": intent, "confidence": 1.0}, add_to_output=True)
+            message.set(INTENT_RANKING_KEY, [{"name": intent, "confidence": 1.0}], add_to_output=True)
+            message.set(ENTITIES, entities(match), add_to_output=True)
+            message.set(FAST_PATH, rule, add_to_output=True)
+            return rule
+        return None
+
+    def _log_counts(self) -> None:
+        counts = {rule: int(FAST_PATH_MESSAGES.value(rule=rule)) for rule, *_ in RULES}
+        matched = sum(counts.values())
+        logger.info(
+            "Fast path classified %d of %d messages (%.0f%%): %s",
+            matched, self._parsed, 100.0 * matched / self._parsed, counts,
+        )
+
+
+class SkipFastPathMixin:
+    """Leaves messages classified by FastPathClassifier out of `process`."""
+
+    def process(self, messages: List[Message]) -> List[Message]:
+        remaining = [message for message in messages if not is_fast_path(message)]
+        if remaining:
+            super().process(remaining)
+        return messages
+
+
+@DefaultV1Recipe.register(
+    [DefaultV1Recipe.ComponentType.INTENT_CLASSIFIER, DefaultV1Recipe.ComponentType.ENTITY_EXTRACTOR],
+    is_trainable=True,
+)
+class FastPathDIETClassifier(SkipFastPathMixin, DIETClassifier):
+    pass
+
+
+@DefaultV1Recipe.register([DefaultV1Recipe.ComponentType.INTENT_CLASSIFIER], is_trainable=True)
+class FastPathResponseSelector(SkipFastPathMixin, ResponseSelector):
+    pass
@@ -0,0 +1,10 @@
+"""Metrics of the Rasa server process, in the action server's Prometheus format.
+
+Components running in the Rasa server register their metrics here, and
+`addons.channels.MetricsInput` serves them on GET /webhooks/metrics/. The action
+server's own metrics are on its /metrics (see actions.metrics).
+"""
+
+from actions.metrics import Registry
+
+REGISTRY = Registry()
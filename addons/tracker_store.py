@@ -0,0 +1,82 @@
+import logging
+from typing import Any, Iterable, List, Optional, Text
+
+from rasa.core.tracker_store import RedisTrackerStore
+from rasa.shared.core.constants import ACTION_LISTEN_NAME, ACTION_SESSION_START_NAME
+from rasa.shared.core.domain import Domain
+from rasa.shared.core.events import ActionExecuted, Event, SlotSet
+from rasa.shared.core.trackers import DialogueStateTracker
+
+logger = logging.getLogger(__name__)
+
+
+class CompactingRedisTrackerStore(RedisTrackerStore):
+    """Redis tracker store that keeps stored conversations small and short-lived.
+
+    - Only the events of the last `keep_sessions` conversation sessions are
+      stored. Slots carried over into a new session are re-set at its start, so
+      older sessions are not needed to restore the tracker.
+    - A conversation whose last bot action is one of `finished_after_actions`
+      is finished: it expires after `finished_record_exp` seconds instead of
+      `record_exp`, and the values of `sensitive_slots` (e.g. the CLS token) are
+      blanked in the stored copy. Any new message makes it active again.
+    """
+
+    def __init__(
+        self,
+        domain: Domain,
+        keep_sessions: int = 1,
+        finished_record_exp: Optional[float] = None,
+        finished_after_actions: Optional[Iterable[Text]] = None,
+        sensitive_slots: Optional[Iterable[Text]] = None,
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(domain, **kwargs)
+        self.keep_sessions = max(1, int(keep_sessions))
+        self.finished_record_exp = float(finished_record_exp) if finished_record_exp else None
+        self.finished_after_actions = set(finished_after_actions or ())
+        self.sensitive_slots = set(sensitive_slots or ())
+
+    async def save(self, tracker: DialogueStateTracker, timeout: Optional[float] = None) -> None:
+        events = self.compact(list(tracker.events))
+        finished = self.is_finished(events)
+        if finished:
+            events = self.scrub(events)
+            if timeout is None and self.finished_record_exp:
+                timeout = self.finished_record_exp
+
+        if len(events) != len(tracker.events) or finished:
+            logger.debug(
+                "Storing %d of %d events for %s (finished: %s)",
+                len(events), len(tracker.events), tracker.sender_id, finished,
+            )
+            tracker = DialogueStateTracker.from_events(
+                tracker.sender_id,
+                events,
+                slots=self.domain.slots,
+                max_event_history=self.max_event_history,
+            )
+        await super().save(tracker, timeout)
+
+    def compact(self, events: List[Event]) -> List[Event]:
+        session_starts = [
+            i for i, event in enumerate(events)
+            if isinstance(event, ActionExecuted) and event.action_name == ACTION_SESSION_START_NAME
+        ]
+        if len(session_starts) <= self.keep_sessions:
+            return events
+        return events[session_starts[-self.keep_sessions]:]
+
+    def is_finished(self, events: List[Event]) -> bool:
+        for event in reversed(events):
+            if isinstance(event, ActionExecuted) and event.action_name != ACTION_LISTEN_NAME:
+                return event.action_name in self.finished_after_actions
+        return False
+
+    def scrub(self, events: List[Event]) -> List[Event]:
+        return [
+            SlotSet(event.key, None, timestamp=event.timestamp, metadata=event.metadata)
+            if isinstance(event, SlotSet) and event.key in self.sensitive_slots and event.value is not None
+            else event
+            for event in events
+        ]
@@ -0,0 +1,49 @@
+"""Read the project's training data without Rasa.
+
+Shared by the readiness check in addons.warmup and the benchmarks, which turn
+the NLU examples of data/nlu.yml into user messages:
+
+    examples = load_examples()
+    render_example(examples, "provide_phone_number", {"phone_number": "03001234567"})
+"""
+
+import os
+import random
+import re
+from typing import Any, Dict, List, Optional, Text
+
+import yaml
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+NLU_PATH = os.path.join(PROJECT_ROOT, "data", "nlu.yml")
+
+# An annotated entity in an NLU example: [value](entity)
+ENTITY_PATTERN = re.compile(r"\[([^\]]+)\]\((\w+)\)")
+
+
+def load_yaml(path: Text) -> Dict[Text, Any]:
+    with open(path, encoding="utf-8") as f:
+        return yaml.safe_load(f) or {}
+
+
+def load_examples(nlu_path: Text = NLU_PATH) -> Dict[Text, List[Text]]:
+    """The annotated examples of each intent."""
+    examples: Dict[Text, List[Text]] = {}
+    for item in load_yaml(nlu_path).get("nlu", []):
+        if "intent" not in item:
+            continue
+        lines = [line[2:].strip() for line in item.get("examples", "").splitlines() if line.startswith("- ")]
+        examples[item["intent"]] = lines
+    return examples
+
+
+def render_example(
+    examples: Dict[Text, List[Text]], intent: Text, entities: Dict[Text, Text], rng: Optional[random.Random] = None
+) -> Text:
+    """A user message for `intent`: one of its examples, preferring those with exactly
+    the given entities, with the annotations replaced by the given values."""
+    candidates = examples.get(intent) or [intent]
+    wanted = set(entities)
+    matching = [c for c in candidates if {m.group(2) for m in ENTITY_PATTERN.finditer(c)} == wanted]
+    example = (rng or random).choice(matching or candidates)
+    return ENTITY_PATTERN.sub(lambda m: entities.get(m.group(2), m.group(1)), example)
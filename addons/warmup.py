@@ -0,0 +1,139 @@
+"""Warm up a freshly started Rasa server and check it before it takes traffic.
+
+The first messages after a model is loaded are slow: TensorFlow builds the
+DIETClassifier, ResponseSelector and TEDPolicy graphs on first use. This sends
+synthetic messages built from data/nlu.yml through NLU parsing and Core
+prediction until latency has settled, checks that the model predicts their
+intents, and only then reports the server as ready:
+
+    rasa run --enable-api &
+    python -m addons.warmup --url http://localhost:5005 --ready-file /tmp/rasa-ready
+
+Use `test -f /tmp/rasa-ready` as the pod's readiness probe. The exit code is
+non-zero if the server did not come up or the self-check failed.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import random
+import sys
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Text, Tuple
+
+import aiohttp
+
+from addons.training_data import load_examples, render_example
+
+logger = logging.getLogger(__name__)
+
+
+def synthetic_messages(count: int, seed: int = 0) -> List[Tuple[Text, Text]]:
+    """(intent, text) pairs cycling through every intent in data/nlu.yml."""
+    examples = load_examples()
+    rng = random.Random(seed)
+    intents = sorted(examples)
+    return [(intents[i % len(intents)], render_example(examples, intents[i % len(intents)], {}, rng)) for i in range(count)]
+
+
+async def wait_until_up(session: aiohttp.ClientSession, url: Text, timeout: float) -> float:
+    started = time.perf_counter()
+    while True:
+        try:
+            async with session.get(f"{url}/status") as response:
+                if response.status == 200 and (await response.json()).get("model_file"):
+                    return time.perf_counter() - started
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError):
+            pass
+        if time.perf_counter() - started > timeout:
+            raise TimeoutError(f"Rasa server at {url} did not load a model within {timeout:.0f}s")
+        await asyncio.sleep(1.0)
+
+
+async def timed_post(session: aiohttp.ClientSession, url: Text, payload: Dict[Text, Any]) -> Tuple[float, Any]:
+    started = time.perf_counter()
+    async with session.post(url, json=payload) as response:
+        response.raise_for_status()
+        body = await response.json()
+    return (time.perf_counter() - started) * 1000, body
+
+
+async def warm_up(args: argparse.Namespace) -> Dict[Text, Any]:
+    messages = synthetic_messages(args.messages, args.seed)
+    async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=args.request_timeout)) as session:
+        startup_s = await wait_until_up(session, args.url, args.timeout)
+
+        parse_ms: List[float] = []
+        correct = 0
+        for intent, text in messages:
+            elapsed, parsed = await timed_post(session, f"{args.url}/model/parse", {"text": text})
+            parse_ms.append(elapsed)
+            correct += (parsed.get("intent") or {}).get("name") == intent
+
+        predict_ms: List[float] = []
+        sender_id = f"warmup-{uuid.uuid4().hex}"
+        for _, text in messages[: args.core_messages]:
+            await timed_post(
+                session, f"{args.url}/conversations/{sender_id}/messages", {"text": text, "sender": "user"}
+            )
+            elapsed, _ = await timed_post(session, f"{args.url}/conversations/{sender_id}/predict", {})
+            predict_ms.append(elapsed)
+
+    settled = sorted(parse_ms[len(parse_ms) // 2:])
+    return {
+        "startup_s": round(startup_s, 1),
+        "first_parse_ms": round(parse_ms[0], 1),
+        "settled_parse_p95_ms": round(settled[int(0.95 * (len(settled) - 1))], 1),
+        "first_predict_ms": round(predict_ms[0], 1) if predict_ms else None,
+        "intent_accuracy": round(correct / len(messages), 3),
+    }
+
+
+def check(report: Dict[Text, Any], args: argparse.Namespace) -> List[Text]:
+    problems = []
+    if report["intent_accuracy"] < args.min_accuracy:
+        problems.append(f"intent accuracy {report['intent_accuracy']} is below {args.min_accuracy}")
+    if args.max_parse_ms and report["settled_parse_p95_ms"] > args.max_parse_ms:
+        problems.append(f"parse p95 {report['settled_parse_p95_ms']}ms is above {args.max_parse_ms}ms")
+    return problems
+
+
+def create_argument_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Warm up and self-check a Rasa server")
+    parser.add_argument("--url", default="http://localhost:5005")
+    parser.add_argument("--messages", type=int, default=50, help="Synthetic messages sent to /model/parse")
+    parser.add_argument("--core-messages", type=int, default=5, help="Of those, messages also run through Core")
+    parser.add_argument("--min-accuracy", type=float, default=0.8,
+                        help="Share of synthetic messages whose intent must be predicted correctly")
+    parser.add_argument("--max-parse-ms", type=float, help="Fail if the settled parse p95 is above this")
+    parser.add_argument("--timeout", type=float, default=600, help="Seconds to wait for the model to load")
+    parser.add_argument("--request-timeout", type=float, default=60)
+    parser.add_argument("--ready-file", help="Created once the server is warm and passed the self-check")
+    parser.add_argument("--seed", type=int, default=0)
+    return parser
+
+
+def main(argv: Optional[List[Text]] = None) -> int:
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(name)s - %(message)s")
+    args = create_argument_parser().parse_args(argv)
+    try:
+        report = asyncio.run(warm_up(args))
+    except (TimeoutError, aiohttp.ClientError) as e:
+        logger.error("Warm-up failed: %s", e)
+        return 1
+
+    logger.info("Warm-up report: %s", json.dumps(report))
+    problems = check(report, args)
+    if problems:
+        logger.error("Self-check failed: %s", "; ".join(problems))
+        return 1
+    if args.ready_file:
+        with open(args.ready_file, "w", encoding="utf-8") as f:
+            json.dump(report, f)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
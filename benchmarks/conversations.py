@@ -0,0 +1,69 @@
+"""Builds realistic user conversations from the project's training data.
+
+Most stories in data/stories.yml are fragments that start at a bot action
+(e.g. `action_check_credit_balance`). A conversation is generated by starting
+from a story that opens with a user intent and repeatedly appending a story that
+starts with the action the previous one ended on. Each user turn is rendered
+from an example of its intent in data/nlu.yml, with entities filled in.
+"""
+
+import os
+import random
+from typing import Any, Dict, List, NamedTuple, Optional, Text
+
+from addons.training_data import PROJECT_ROOT, load_examples, load_yaml, render_example
+
+
+class Turn(NamedTuple):
+    intent: Text
+    text: Text
+
+
+def load_stories(stories_path: Text) -> List[List[Dict[Text, Any]]]:
+    return [story["steps"] for story in load_yaml(stories_path).get("stories", []) if story.get("steps")]
+
+
+class ConversationGenerator:
+    def __init__(
+        self,
+        stories_path: Text = os.path.join(PROJECT_ROOT, "data", "stories.yml"),
+        nlu_path: Text = os.path.join(PROJECT_ROOT, "data", "nlu.yml"),
+        seed: Optional[int] = None,
+        max_stories: int = 8,
+    ) -> None:
+        self.stories = load_stories(stories_path)
+        self.examples = load_examples(nlu_path)
+        self.rng = random.Random(seed)
+        self.max_stories = max_stories
+        self.openers = [s for s in self.stories if "intent" in s[0]]
+        self.by_first_action: Dict[Text, List[List[Dict[Text, Any]]]] = {}
+        for steps in self.stories:
+            if "action" in steps[0]:
+                self.by_first_action.setdefault(steps[0]["action"], []).append(steps)
+
+    def render(self, intent: Text, entities: Dict[Text, Text]) -> Text:
+        return render_example(self.examples, intent, entities, self.rng)
+
+    def conversation(self, entity_values: Dict[Text, Text]) -> List[Turn]:
+        """Return the user turns of one stitched-together conversation.
+
+        `entity_values` supplies the values used for entities such as
+        `phone_number`, so the turns can hit real (or mock) customers.
+        """
+        turns: List[Turn] = []
+        steps = self.rng.choice(self.openers)
+        for _ in range(self.max_stories):
+            for step in steps:
+                if "intent" not in step:
+                    continue
+                entities = {}
+                for entity in step.get("entities") or []:
+                    for name, value in entity.items():
+                        entities[name] = entity_values.get(name, str(value))
+                turns.append(Turn(step["intent"], self.render(step["intent"], entities)))
+            last_action = next((s["action"] for s in reversed(steps) if "action" in s), None)
+            followers = self.by_first_action.get(last_action)
+            if not followers:
+                break
+            steps = self.rng.choice(followers)
+        return turns
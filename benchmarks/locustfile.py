@@ -0,0 +1,102 @@
+"""End-to-end load test of the bot through the REST channel used by ChatWindow.js.
+
+Start the mock CLS API, the action server pointed at it and the Rasa server,
+then run for example:
+
+    locust -f benchmarks/locustfile.py --host http://localhost:5005 \\
+        --headless -u 200 -r 20 -t 5m
+
+Each simulated user plays conversations generated from data/stories.yml with
+its own sender id. Environment variables:
+
+- BENCH_CUSTOMERS: customer count the mock CLS API was started with (phone
+  numbers are drawn from it)
+- BENCH_REPORT: path of a JSON file to write the summary to
+- BENCH_MAX_P95_MS: exit non-zero if the overall p95 turn latency exceeds this
+"""
+
+import json
+import logging
+import os
+import random
+import sys
+import uuid
+
+from locust import HttpUser, between, events, task
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.conversations import ConversationGenerator  # noqa: E402
+from benchmarks.mock_cls_api import phone_for  # noqa: E402
+
+logger = logging.getLogger(__name__)
+
+CUSTOMERS = int(os.environ.get("BENCH_CUSTOMERS", "10000"))
+NAMES = ["Shayan", "Sara", "Ali", "Fatima", "John", "Maria"]
+
+generator = ConversationGenerator()
+
+
+class ChatUser(HttpUser):
+    wait_time = between(1, 3)
+
+    @task
+    def conversation(self) -> None:
+        sender = f"bench-{uuid.uuid4().hex}"
+        entity_values = {
+            "phone_number": phone_for(random.randrange(CUSTOMERS)),
+            "package_choice": random.choice("ABC"),
+            "name": random.choice(NAMES),
+        }
+        for turn in generator.conversation(entity_values):
+            with self.client.post(
+                "/webhooks/rest/webhook",
+                json={"sender": sender, "message": turn.text, "metadata": {"trace_id": uuid.uuid4().hex}},
+                name=f"turn:{turn.intent}",
+                catch_response=True,
+            ) as response:
+                if response.status_code != 200:
+                    response.failure(f"status {response.status_code}")
+                    return
+                try:
+                    replies = response.json()
+                except ValueError:
+                    response.failure("reply is not JSON")
+                    return
+                if not isinstance(replies, list):
+                    response.failure("reply is not a list of messages")
+                    return
+                response.success()
+
+
+@events.test_stop.add_listener
+def report(environment, **_kwargs) -> None:
+    total = environment.stats.total
+    summary = {
+        "turns": total.num_requests,
+        "failures": total.num_failures,
+        "turns_per_sec": round(total.total_rps, 2),
+        "p50_ms": total.get_response_time_percentile(0.50),
+        "p95_ms": total.get_response_time_percentile(0.95),
+        "p99_ms": total.get_response_time_percentile(0.99),
+        "by_intent": {
+            name: {
+                "turns": entry.num_requests,
+                "p50_ms": entry.get_response_time_percentile(0.50),
+                "p95_ms": entry.get_response_time_percentile(0.95),
+                "p99_ms": entry.get_response_time_percentile(0.99),
+            }
+            for (name, _method), entry in environment.stats.entries.items()
+        },
+    }
+    logger.info("Benchmark summary: %s", json.dumps(summary, indent=2))
+
+    report_path = os.environ.get("BENCH_REPORT")
+    if report_path:
+        with open(report_path, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+
+    max_p95 = os.environ.get("BENCH_MAX_P95_MS")
+    if max_p95 and total.num_requests and summary["p95_ms"] > float(max_p95):
+        logger.error("p95 latency %sms is above the %sms budget", summary["p95_ms"], max_p95)
+        environment.process_exit_code = 1
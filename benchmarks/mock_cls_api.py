@@ -0,0 +1,126 @@
+"""Local stand-in for the CLS API used by the action server.
+
+Serves the three endpoints the actions call, with a configurable customer count,
+call-history size, latency and error rates:
+
+    python -m benchmarks.mock_cls_api --port 8443 --customers 50000 --latency-ms 30
+
+then start the action server with CLS_BASE_URL=http://localhost:8443/cls_api.
+Customer phone numbers are `phone_for(0)` .. `phone_for(customers - 1)`.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from typing import Any, Dict, List, Text
+
+import jwt
+from aiohttp import web
+
+TOKEN_SECRET = "mock-cls-api"
+
+
+def phone_for(index: int) -> Text:
+    return f"0300{index:07d}"
+
+
+def build_customers(count: int, zero_credit_ratio: float) -> List[Dict[Text, Any]]:
+    rng = random.Random(count)
+    return [
+        {
+            "id": str(1000 + i),
+            "name": f"Customer {i}",
+            "phone": phone_for(i),
+            "creditLimit": 0.0 if rng.random() < zero_credit_ratio else round(rng.uniform(1, 500), 2),
+        }
+        for i in range(count)
+    ]
+
+
+def build_calls(customer_id: Text, count: int) -> List[Dict[Text, Any]]:
+    rng = random.Random(customer_id)
+    return [
+        {
+            "number": f"03{rng.randrange(10 ** 9):09d}",
+            "callDate": f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            "duration": rng.randint(5, 1800),
+            "callType": rng.choice(["OUTGOING", "INCOMING", "MISSED"]),
+        }
+        for _ in range(count)
+    ]
+
+
+class MockClsApi:
+    def __init__(self, args: argparse.Namespace) -> None:
+        self.args = args
+        self.customers_body = json.dumps(build_customers(args.customers, args.zero_credit_ratio)).encode()
+        self.customer_ids = {str(1000 + i) for i in range(args.customers)}
+        self.requests: Dict[Text, int] = {}
+
+    async def _simulate(self, endpoint: Text) -> None:
+        self.requests[endpoint] = self.requests.get(endpoint, 0) + 1
+        delay = self.args.latency_ms + random.uniform(0, self.args.jitter_ms)
+        await asyncio.sleep(delay / 1000.0)
+        if random.random() < self.args.error_rate:
+            raise web.HTTPServiceUnavailable()
+
+    def _check_token(self, request: web.Request) -> None:
+        header = request.headers.get("Authorization", "")
+        try:
+            jwt.decode(header[len("Bearer "):], TOKEN_SECRET, algorithms=["HS256"])
+        except jwt.PyJWTError:
+            raise web.HTTPUnauthorized()
+
+    async def authenticate(self, request: web.Request) -> web.Response:
+        await self._simulate("authenticate")
+        if not request.query.get("username") or not request.query.get("password"):
+            raise web.HTTPUnauthorized()
+        claims = {"sub": request.query["username"], "exp": int(time.time()) + self.args.token_ttl}
+        return web.json_response({"token": jwt.encode(claims, TOKEN_SECRET, algorithm="HS256")})
+
+    async def get_all_customers(self, request: web.Request) -> web.Response:
+        await self._simulate("getAllCustomers")
+        self._check_token(request)
+        return web.Response(body=self.customers_body, content_type="application/json")
+
+    async def get_recent_calls(self, request: web.Request) -> web.Response:
+        await self._simulate("getRecentCallsByCustomerId")
+        self._check_token(request)
+        customer_id = request.query.get("customerId", "")
+        if customer_id not in self.customer_ids or random.random() < self.args.no_history_rate:
+            return web.json_response({"message": "No call history found"}, status=417)
+        return web.json_response(build_calls(customer_id, self.args.calls_per_customer))
+
+    async def stats(self, _: web.Request) -> web.Response:
+        return web.json_response(self.requests)
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/cls_api/auth/authenticate", self.authenticate)
+        app.router.add_get("/cls_api/getAllCustomers", self.get_all_customers)
+        app.router.add_get("/cls_api/getRecentCallsByCustomerId", self.get_recent_calls)
+        app.router.add_get("/cls_api/_stats", self.stats)
+        return app
+
+
+def create_argument_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Mock CLS API for load tests")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8443)
+    parser.add_argument("--customers", type=int, default=10000)
+    parser.add_argument("--zero-credit-ratio", type=float, default=0.5,
+                        help="Share of customers with a credit balance of 0 (leads to the call history flow)")
+    parser.add_argument("--calls-per-customer", type=int, default=50)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--jitter-ms", type=float, default=10.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests answered with 503")
+    parser.add_argument("--no-history-rate", type=float, default=0.1, help="Share of call history requests answered with 417")
+    parser.add_argument("--token-ttl", type=int, default=3600)
+    return parser
+
+
+if __name__ == "__main__":
+    cli_args = create_argument_parser().parse_args()
+    web.run_app(MockClsApi(cli_args).app(), host=cli_args.host, port=cli_args.port)
@@ -0,0 +1,138 @@
+"""CPU time and allocations per action run, on trackers with many events and slots.
+
+    python -m benchmarks.slot_access_bench --events 100 1000 10000 --extra-slots 50
+
+Runs the actions that do not call the CLS API against a synthetic tracker, with
+DEBUG logging off and on, and compares reading and logging a slot view
+(actions.slots) with logging every slot via `tracker.current_slot_values()`.
+CPU time includes the log listener thread, which formats the records.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import time
+import tracemalloc
+from typing import Any, Awaitable, Callable, Dict, List, Text
+
+from rasa_sdk import Tracker
+from rasa_sdk.executor import CollectingDispatcher
+
+from actions.actions import (
+    ActionCheckCreditBalance,
+    ActionConnectToRepresentative,
+    ActionOfferCreditIncrease,
+    ActionOfferRepresentative,
+    ActionPresentPackages,
+    ActionUpgradePackage,
+)
+from actions.log import fields, log_slots
+from actions.slots import CallHistorySlots, read_slots
+
+logger = logging.getLogger("actions.bench")
+
+ACTIONS = [
+    ActionCheckCreditBalance(),
+    ActionConnectToRepresentative(),
+    ActionOfferCreditIncrease(),
+    ActionPresentPackages(),
+    ActionUpgradePackage(),
+    ActionOfferRepresentative(),
+]
+
+
+def build_tracker(events: int, extra_slots: int) -> Tracker:
+    slots: Dict[Text, Any] = {
+        "username": "mminds",
+        "password": "mm123",
+        "phone_number": "03001234567",
+        "auth_token": "x" * 200,
+        "credit_balance": 12.5,
+        "customer_id": "1001",
+        "current_question": "still_unable",
+        "package_choice": "B",
+        "name": "Sara",
+    }
+    slots.update({f"extra_{i}": f"value {i}" * 4 for i in range(extra_slots)})
+    history: List[Dict[Text, Any]] = []
+    for i in range(events // 2):
+        history.append({"event": "user", "text": f"message {i}", "parse_data": {"intent": {"name": "affirm"}}})
+        history.append({"event": "action", "name": "action_listen"})
+    return Tracker(
+        sender_id="bench",
+        slots=slots,
+        latest_message=history[-2] if history else {},
+        events=history,
+        paused=False,
+        followup_action=None,
+        active_loop={},
+        latest_action_name="action_listen",
+    )
+
+
+async def measure(fn: Callable[[], Awaitable[Any]], repeat: int) -> Dict[Text, float]:
+    await fn()
+    started = time.process_time()
+    for _ in range(repeat):
+        await fn()
+    cpu_us = (time.process_time() - started) / repeat * 1e6
+
+    # A fresh start() traces from zero, so the peak is that of this one call.
+    tracemalloc.start()
+    try:
+        await fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"cpu_us": round(cpu_us, 2), "peak_alloc_bytes": peak}
+
+
+async def run_action(action: Any, tracker: Tracker) -> None:
+    await action.run(CollectingDispatcher(), tracker, {})
+
+
+async def all_slots(tracker: Tracker) -> None:
+    # Slot access as the actions did it before slot views: get_slot per slot and
+    # every slot of the tracker in the debug log line.
+    tracker.get_slot("phone_number"), tracker.get_slot("customer_id"), tracker.get_slot("name")
+    logger.debug("Current slots", extra=fields(slots=tracker.current_slot_values()))
+
+
+async def slot_view(tracker: Tracker) -> None:
+    log_slots(logger, "Bench", read_slots(tracker, CallHistorySlots))
+
+
+async def main(args: argparse.Namespace) -> List[Dict[Text, Any]]:
+    actions_logger = logging.getLogger("actions")
+    results = []
+    for events in args.events:
+        tracker = build_tracker(events, args.extra_slots)
+        for debug in (False, True):
+            actions_logger.setLevel(logging.DEBUG if debug else logging.INFO)
+            cases = [(a.name(), lambda a=a: run_action(a, tracker)) for a in ACTIONS]
+            cases += [("slot_access:all_slots", lambda: all_slots(tracker)),
+                      ("slot_access:slot_view", lambda: slot_view(tracker))]
+            for name, fn in cases:
+                result = {"case": name, "events": events, "slots": len(tracker.slots), "debug": debug}
+                result.update(await measure(fn, args.repeat))
+                results.append(result)
+                print(json.dumps(result))
+    return results
+
+
+def create_argument_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Per-action slot access micro-benchmark")
+    parser.add_argument("--events", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--extra-slots", type=int, default=50, help="Slots in the tracker besides the domain's")
+    parser.add_argument("--repeat", type=int, default=2000)
+    parser.add_argument("--report", help="Write the results as JSON to this path")
+    return parser
+
+
+if __name__ == "__main__":
+    cli_args = create_argument_parser().parse_args()
+    report = asyncio.run(main(cli_args))
+    if cli_args.report:
+        with open(cli_args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
@@ -0,0 +1,120 @@
+"""Time to first response and per-component inference latency of a trained model.
+
+    python -m benchmarks.startup_bench --model models/ --messages 200
+
+Loads the model in-process the way `rasa run` does, then times the first NLU
+parse and Core prediction (which build the TensorFlow graphs) against the
+settled latency of the following ones. Every graph node of the model, i.e.
+every pipeline component and policy in config.yml, is timed separately.
+"""
+
+import argparse
+import asyncio
+import inspect
+import json
+import statistics
+import time
+import uuid
+from collections import defaultdict
+from typing import Any, Dict, List, Text
+
+from rasa.core.agent import load_agent
+from rasa.engine.graph import GraphNode
+from rasa.shared.core.events import UserUttered
+
+from addons.warmup import synthetic_messages
+
+COMPONENT_MS: Dict[Text, List[float]] = defaultdict(list)
+
+
+def time_graph_nodes() -> None:
+    """Record how long each graph node takes, keyed by its node name."""
+    call = GraphNode.__call__
+
+    if inspect.iscoroutinefunction(call):
+        async def timed_call(self: GraphNode, *inputs: Any) -> Any:
+            started = time.perf_counter()
+            try:
+                return await call(self, *inputs)
+            finally:
+                COMPONENT_MS[self._node_name].append((time.perf_counter() - started) * 1000)
+    else:
+        def timed_call(self: GraphNode, *inputs: Any) -> Any:
+            started = time.perf_counter()
+            try:
+                return call(self, *inputs)
+            finally:
+                COMPONENT_MS[self._node_name].append((time.perf_counter() - started) * 1000)
+
+    GraphNode.__call__ = timed_call
+
+
+def summarize(samples: List[float]) -> Dict[Text, float]:
+    first, settled = samples[0], sorted(samples[1:] or samples)
+    return {
+        "first_ms": round(first, 2),
+        "p50_ms": round(statistics.median(settled), 2),
+        "p95_ms": round(settled[int(0.95 * (len(settled) - 1))], 2),
+    }
+
+
+async def main(args: argparse.Namespace) -> Dict[Text, Any]:
+    time_graph_nodes()
+    started = time.perf_counter()
+    agent = await load_agent(model_path=args.model)
+    load_s = time.perf_counter() - started
+    COMPONENT_MS.clear()
+
+    messages = synthetic_messages(args.messages, args.seed)
+    parse_ms = []
+    for _, text in messages:
+        started = time.perf_counter()
+        await agent.parse_message(text)
+        parse_ms.append((time.perf_counter() - started) * 1000)
+    nlu_components = {name: summarize(samples) for name, samples in COMPONENT_MS.items()}
+    COMPONENT_MS.clear()
+
+    predict_ms = []
+    core_ms: Dict[Text, List[float]] = defaultdict(list)
+    sender_id = f"bench-{uuid.uuid4().hex}"
+    for _, text in messages[: args.core_messages]:
+        parse_data = await agent.parse_message(text)
+        tracker = await agent.processor.get_tracker(sender_id)
+        tracker.update(UserUttered(text, parse_data["intent"], parse_data["entities"], parse_data))
+        await agent.tracker_store.save(tracker)
+        COMPONENT_MS.clear()
+        started = time.perf_counter()
+        await agent.predict_next_for_sender_id(sender_id)
+        predict_ms.append((time.perf_counter() - started) * 1000)
+        for name, samples in COMPONENT_MS.items():
+            core_ms[name].extend(samples)
+    core_components = {name: summarize(samples) for name, samples in core_ms.items()}
+
+    report = {
+        "model_load_s": round(load_s, 2),
+        "time_to_first_response_s": round(load_s + (parse_ms[0] + predict_ms[0]) / 1000, 2),
+        "parse": summarize(parse_ms),
+        "predict": summarize(predict_ms),
+        "nlu_components": nlu_components,
+        "core_components": core_components,
+    }
+    print(json.dumps(report, indent=2))
+    return report
+
+
+def create_argument_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Model start-up and per-component latency benchmark")
+    parser.add_argument("--model", default="models", help="Model file, or directory to take the latest from")
+    parser.add_argument("--messages", type=int, default=200, help="Synthetic messages parsed")
+    parser.add_argument("--core-messages", type=int, default=50, help="Turns run through Core prediction (at least 1)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--report", help="Write the results as JSON to this path")
+    return parser
+
+
+if __name__ == "__main__":
+    cli_args = create_argument_parser().parse_args()
+    report = asyncio.run(main(cli_args))
+    if cli_args.report:
+        with open(cli_args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
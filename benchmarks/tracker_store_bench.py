@@ -0,0 +1,188 @@
+"""Per-turn latency of the tracker and lock store as the number of stored trackers grows.
+
+Each simulated turn does what the Rasa server does for one message: lock the
+conversation, load its tracker, append the turn's events and save it. Run
+against the stores configured in endpoints.production.yml, either on a real Redis:
+
+    python -m benchmarks.tracker_store_bench --redis-url redis://localhost:6379 \\
+        --trackers 1000 10000 50000
+
+or, without --redis-url, on an in-process fakeredis stand-in (installed with
+requirements-dev.txt). Both the compacting store from endpoints.production.yml
+and Rasa's plain RedisTrackerStore are measured, so the effect of compaction on
+latency and stored size is visible.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Text
+from urllib.parse import urlparse
+
+import fakeredis
+import redis
+from rasa.core.lock_store import RedisLockStore
+from rasa.core.tracker_store import RedisTrackerStore, TrackerStore
+from rasa.shared.core.constants import ACTION_LISTEN_NAME, ACTION_SESSION_START_NAME
+from rasa.shared.core.domain import Domain
+from rasa.shared.core.events import ActionExecuted, BotUttered, SessionStarted, SlotSet, UserUttered
+
+from addons.tracker_store import CompactingRedisTrackerStore
+from benchmarks.conversations import PROJECT_ROOT, load_yaml
+
+
+def session_events(phone: Text) -> List[Any]:
+    return [
+        ActionExecuted(ACTION_SESSION_START_NAME),
+        SessionStarted(),
+        ActionExecuted(ACTION_LISTEN_NAME),
+        UserUttered("my phone is " + phone, {"name": "provide_phone_number", "confidence": 1.0}),
+        SlotSet("phone_number", phone),
+        SlotSet("customer_id", phone[-4:]),
+        SlotSet("auth_token", uuid.uuid4().hex * 4),
+        SlotSet("credit_balance", 0.0),
+        ActionExecuted("action_check_credit_balance"),
+        BotUttered("Your credit balance is 0."),
+        ActionExecuted(ACTION_LISTEN_NAME),
+    ]
+
+
+def turn_events(turn: int) -> List[Any]:
+    return [
+        UserUttered(f"message {turn}", {"name": "affirm", "confidence": 1.0}),
+        ActionExecuted("action_show_call_history"),
+        BotUttered("Here are your top 5 recent calls:\n" + "\n".join(f"- Call {i}" for i in range(5))),
+        ActionExecuted(ACTION_LISTEN_NAME),
+    ]
+
+
+def build_stores(args: argparse.Namespace, domain: Domain) -> Dict[Text, Any]:
+    endpoints = load_yaml(os.path.join(PROJECT_ROOT, "endpoints.production.yml"))
+    options = {k: v for k, v in endpoints.get("tracker_store", {}).items() if k not in ("type", "url")}
+    lock_options = {k: v for k, v in endpoints.get("lock_store", {}).items() if k not in ("type", "url")}
+
+    if args.redis_url:
+        url = urlparse(args.redis_url)
+        host, port = url.hostname or "localhost", url.port or 6379
+        options.update(port=port)
+        lock_options.update(port=port)
+        client = redis.StrictRedis(host=host, port=port, db=options.get("db", 0))
+    else:
+        host, client = "localhost", fakeredis.FakeStrictRedis()
+
+    plain_options = {k: v for k, v in options.items() if k in ("port", "db", "key_prefix", "record_exp")}
+    stores = {
+        "compacting": CompactingRedisTrackerStore(domain, host=host, **options),
+        "plain": RedisTrackerStore(domain, host=host, **dict(plain_options, key_prefix="bench_plain")),
+    }
+    lock_store = RedisLockStore(host=host, **lock_options)
+    if not args.redis_url:
+        for store in stores.values():
+            store.red = client
+        lock_store.red = fakeredis.FakeStrictRedis()
+    return {"stores": stores, "lock_store": lock_store, "client": client}
+
+
+async def populate(store: TrackerStore, sender_ids: List[Text], sessions: int, turns_per_session: int) -> None:
+    for sender_id in sender_ids:
+        tracker = await store.get_or_create_tracker(sender_id, append_action_listen=False)
+        for session in range(sessions):
+            for event in session_events(f"0300{random.randrange(10 ** 7):07d}"):
+                tracker.update(event)
+            for turn in range(turns_per_session):
+                for event in turn_events(turn):
+                    tracker.update(event)
+        await store.save(tracker)
+
+
+async def run_turn(store: TrackerStore, lock_store: RedisLockStore, sender_id: Text, turn: int) -> float:
+    started = time.perf_counter()
+    async with lock_store.lock(sender_id):
+        tracker = await store.retrieve(sender_id)
+        for event in turn_events(turn):
+            tracker.update(event)
+        await store.save(tracker)
+    return time.perf_counter() - started
+
+
+async def measure(
+    store: TrackerStore, lock_store: RedisLockStore, sender_ids: List[Text], turns: int, concurrency: int
+) -> Dict[Text, float]:
+    semaphore = asyncio.Semaphore(concurrency)
+    # Distinct senders per batch: Rasa never handles two messages of one
+    # conversation at the same time either.
+    chosen = random.sample(sender_ids, min(turns, len(sender_ids)))
+
+    async def one(i: int, sender_id: Text) -> float:
+        async with semaphore:
+            return await run_turn(store, lock_store, sender_id, i)
+
+    started = time.perf_counter()
+    latencies = sorted(await asyncio.gather(*(one(i, s) for i, s in enumerate(chosen))))
+    elapsed = time.perf_counter() - started
+
+    def percentile(p: float) -> float:
+        return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000, 2)
+
+    return {
+        "turns": len(latencies),
+        "turns_per_sec": round(len(latencies) / elapsed, 1),
+        "mean_ms": round(statistics.mean(latencies) * 1000, 2),
+        "p50_ms": percentile(0.50),
+        "p95_ms": percentile(0.95),
+        "p99_ms": percentile(0.99),
+    }
+
+
+def stored_bytes(client: Any, store: Any, sender_ids: List[Text], sample: int = 200) -> Optional[int]:
+    keys = [store.key_prefix + s for s in random.sample(sender_ids, min(sample, len(sender_ids)))]
+    sizes = [client.strlen(key) for key in keys]
+    return int(statistics.mean(sizes)) if sizes else None
+
+
+async def main(args: argparse.Namespace) -> List[Dict[Text, Any]]:
+    random.seed(args.seed)
+    domain = Domain.load(os.path.join(PROJECT_ROOT, "domain.yml"))
+    setup = build_stores(args, domain)
+    results = []
+    for name, store in setup["stores"].items():
+        sender_ids: List[Text] = []
+        for count in sorted(args.trackers):
+            new_ids = [f"bench-{name}-{i}" for i in range(len(sender_ids), count)]
+            await populate(store, new_ids, args.sessions, args.turns_per_session)
+            sender_ids.extend(new_ids)
+            result = {"store": name, "trackers": count}
+            result.update(await measure(store, setup["lock_store"], sender_ids, args.turns, args.concurrency))
+            result["avg_stored_bytes"] = stored_bytes(setup["client"], store, sender_ids)
+            results.append(result)
+            print(json.dumps(result))
+        for sender_id in sender_ids:
+            await store.delete(sender_id)
+    return results
+
+
+def create_argument_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Tracker store latency benchmark")
+    parser.add_argument("--redis-url", help="Redis to run against; an in-process fakeredis is used if omitted")
+    parser.add_argument("--trackers", type=int, nargs="+", default=[100, 1000, 5000],
+                        help="Numbers of stored trackers to measure at")
+    parser.add_argument("--sessions", type=int, default=3, help="Past sessions per stored tracker")
+    parser.add_argument("--turns-per-session", type=int, default=4)
+    parser.add_argument("--turns", type=int, default=500, help="Measured turns per tracker count")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--report", help="Write the results as JSON to this path")
+    return parser
+
+
+if __name__ == "__main__":
+    cli_args = create_argument_parser().parse_args()
+    report = asyncio.run(main(cli_args))
+    if cli_args.report:
+        with open(cli_args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
@@ -0,0 +1,375 @@
+"""Training cost, model size, accuracy and latency as the training data grows, per config variant.
+
+    python -m benchmarks.training_bench --scales 1 2 4 \\
+        --variants baseline epochs_30 char_ngrams_1_3 max_history_5 --report training.json
+
+For every scale, synthetic training data is generated from data/nlu.yml and
+data/stories.yml: each intent gets `scale` times its examples (new entity values,
+casing, filler words) and `scale` times as many stories, stitched together from
+the story fragments the way benchmarks.conversations does. data/rules.yml is
+used as is. A share of each intent's original examples is held out of training
+at every scale, so accuracy is always measured on the same unseen messages.
+
+Every config variant is trained on every scale in a subprocess with `rasa
+train`, then evaluated in another subprocess:
+
+- train_s, train_peak_rss_mb, model_mb
+- intent_accuracy on the held-out examples, and parse latency per message
+- core_accuracy (`rasa test core` action accuracy on held-out stitched
+  stories) and latency of next-action prediction per turn
+- eval_peak_rss_mb of the process serving the model
+"""
+
+import argparse
+import asyncio
+import copy
+import json
+import os
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Text, Tuple
+
+import psutil
+import yaml
+
+from addons.training_data import ENTITY_PATTERN
+from benchmarks.conversations import PROJECT_ROOT, ConversationGenerator, load_yaml
+
+PREFIXES = ["", "", "hi, ", "hello ", "please ", "um ", "ok so ", "hey, "]
+SUFFIXES = ["", "", " please", " thanks", "?", ".", "!", " asap"]
+NAMES = ["Shayan", "Sara", "Ali", "Fatima", "John", "Maria", "Ahmed", "Ayesha", "Omar", "Zara"]
+
+
+# Config variants: each takes the parsed config.yml and changes it in place.
+def _set_epochs(epochs: int) -> Callable[[Dict[Text, Any]], None]:
+    def apply(config: Dict[Text, Any]) -> None:
+        for item in config.get("pipeline", []) + config.get("policies", []):
+            if "epochs" in item:
+                item["epochs"] = epochs
+    return apply
+
+
+def _set_char_ngrams(min_ngram: int, max_ngram: int) -> Callable[[Dict[Text, Any]], None]:
+    def apply(config: Dict[Text, Any]) -> None:
+        for item in config.get("pipeline", []):
+            if item.get("analyzer") == "char_wb":
+                item.update(min_ngram=min_ngram, max_ngram=max_ngram)
+    return apply
+
+
+def _set_max_history(max_history: int) -> Callable[[Dict[Text, Any]], None]:
+    def apply(config: Dict[Text, Any]) -> None:
+        for item in config.get("policies", []):
+            if "max_history" in item:
+                item["max_history"] = max_history
+    return apply
+
+
+VARIANTS: Dict[Text, Callable[[Dict[Text, Any]], None]] = {
+    "baseline": lambda config: None,
+    "epochs_30": _set_epochs(30),
+    "epochs_50": _set_epochs(50),
+    "char_ngrams_1_3": _set_char_ngrams(1, 3),
+    "char_ngrams_2_3": _set_char_ngrams(2, 3),
+    "max_history_5": _set_max_history(5),
+    "max_history_3": _set_max_history(3),
+}
+
+
+def entity_value(entity: Text, original: Text, rng: random.Random) -> Text:
+    if entity == "phone_number":
+        return "03" + "".join(rng.choice("0123456789") for _ in range(9))
+    if entity == "package_choice":
+        return rng.choice("ABC")
+    if entity == "name":
+        return rng.choice(NAMES)
+    if entity in ("username", "password"):
+        return original + str(rng.randrange(1000))
+    return original
+
+
+def augment(example: Text, rng: random.Random) -> Text:
+    text = ENTITY_PATTERN.sub(
+        lambda m: f"[{entity_value(m.group(2), m.group(1), rng)}]({m.group(2)})", example
+    )
+    text = rng.choice(PREFIXES) + text + rng.choice(SUFFIXES)
+    return text.lower() if rng.random() < 0.3 else text
+
+
+def strip_annotations(example: Text) -> Text:
+    return ENTITY_PATTERN.sub(lambda m: m.group(1), example)
+
+
+def split_examples(
+    examples: Dict[Text, List[Text]], test_fraction: float, rng: random.Random
+) -> Tuple[Dict[Text, List[Text]], List[Tuple[Text, Text]]]:
+    train, test = {}, []
+    for intent, lines in examples.items():
+        lines = lines[:]
+        rng.shuffle(lines)
+        held_out = int(len(lines) * test_fraction) if len(lines) >= 5 else 0
+        test.extend((intent, strip_annotations(line)) for line in lines[:held_out])
+        train[intent] = lines[held_out:]
+    return train, test
+
+
+def scale_examples(examples: Dict[Text, List[Text]], scale: int, rng: random.Random) -> Dict[Text, List[Text]]:
+    scaled = {}
+    for intent, lines in examples.items():
+        seen = set(lines)
+        out = list(lines)
+        attempts = 0
+        while len(out) < len(lines) * scale and attempts < len(lines) * scale * 20:
+            attempts += 1
+            candidate = augment(rng.choice(lines), rng)
+            if candidate not in seen:
+                seen.add(candidate)
+                out.append(candidate)
+        scaled[intent] = out
+    return scaled
+
+
+def stitched_story(generator: ConversationGenerator, rng: random.Random, max_fragments: int) -> List[Dict[Text, Any]]:
+    """Chain story fragments: each next fragment starts with the action the previous one ended on."""
+    steps = copy.deepcopy(rng.choice(generator.openers))
+    for _ in range(max_fragments - 1):
+        last_action = next((s["action"] for s in reversed(steps) if "action" in s), None)
+        followers = generator.by_first_action.get(last_action)
+        if not followers:
+            break
+        steps.extend(copy.deepcopy(rng.choice(followers)[1:]))
+    return steps
+
+
+def write_nlu(path: Text, examples: Dict[Text, List[Text]], other_items: List[Dict[Text, Any]]) -> None:
+    items = [{"intent": intent, "examples": "".join(f"- {line}\n" for line in lines)}
+             for intent, lines in examples.items()]
+    write_yaml(path, {"version": "3.1", "nlu": items + other_items})
+
+
+def write_yaml(path: Text, data: Dict[Text, Any]) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        yaml.safe_dump(data, f, allow_unicode=True, sort_keys=False)
+
+
+def build_project(
+    directory: Text, scale: int, train_examples: Dict[Text, List[Text]], args: argparse.Namespace
+) -> Dict[Text, int]:
+    rng = random.Random(args.seed + scale)
+    data_dir = os.path.join(directory, "data")
+    os.makedirs(data_dir, exist_ok=True)
+    nlu = load_yaml(os.path.join(PROJECT_ROOT, "data", "nlu.yml"))
+    other_items = [item for item in nlu.get("nlu", []) if "intent" not in item]
+    examples = scale_examples(train_examples, scale, rng)
+    write_nlu(os.path.join(data_dir, "nlu.yml"), examples, other_items)
+
+    generator = ConversationGenerator(seed=args.seed + scale)
+    stories = load_yaml(os.path.join(PROJECT_ROOT, "data", "stories.yml")).get("stories", [])
+    extra = len(stories) * (scale - 1)
+    stories = stories + [
+        {"story": f"synthetic story {i}", "steps": stitched_story(generator, rng, args.max_fragments)}
+        for i in range(extra)
+    ]
+    write_yaml(os.path.join(data_dir, "stories.yml"), {"version": "3.1", "stories": stories})
+    shutil.copy(os.path.join(PROJECT_ROOT, "data", "rules.yml"), data_dir)
+    shutil.copy(os.path.join(PROJECT_ROOT, "domain.yml"), directory)
+    return {"nlu_examples": sum(len(lines) for lines in examples.values()), "stories": len(stories)}
+
+
+def build_test_set(directory: Text, test_messages: List[Tuple[Text, Text]], args: argparse.Namespace) -> None:
+    rng = random.Random(args.seed - 1)
+    generator = ConversationGenerator(seed=args.seed - 1)
+    stories = [
+        {"story": f"test story {i}", "steps": stitched_story(generator, rng, args.max_fragments)}
+        for i in range(args.test_stories)
+    ]
+    write_yaml(os.path.join(directory, "test_stories.yml"), {"version": "3.1", "stories": stories})
+    with open(os.path.join(directory, "test_messages.json"), "w", encoding="utf-8") as f:
+        json.dump(test_messages, f)
+
+
+def run_measured(command: List[Text], cwd: Text, interval: float = 0.1) -> Tuple[int, float, float, Text]:
+    """Run `command`; return its exit code, wall time, peak RSS in MB and stdout.
+
+    The RSS of the process and its children is sampled every `interval` seconds,
+    so short-lived peaks between two samples are missed.
+    """
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [PROJECT_ROOT, os.environ.get("PYTHONPATH")])))
+    started = time.perf_counter()
+    peak = 0
+    with tempfile.TemporaryFile("w+") as out:
+        process = subprocess.Popen(command, cwd=cwd, env=env, stdout=out, stderr=subprocess.DEVNULL)
+        try:
+            tree = psutil.Process(process.pid)
+        except psutil.NoSuchProcess:
+            tree = None
+        while process.poll() is None:
+            if tree is not None:
+                peak = max(peak, _tree_rss(tree))
+            time.sleep(interval)
+        elapsed = time.perf_counter() - started
+        out.seek(0)
+        stdout = out.read()
+    return process.returncode, elapsed, peak / 2 ** 20, stdout
+
+
+def _tree_rss(process: "psutil.Process") -> int:
+    rss = 0
+    try:
+        for p in [process] + process.children(recursive=True):
+            try:
+                rss += p.memory_info().rss
+            except psutil.NoSuchProcess:
+                pass
+    except psutil.NoSuchProcess:
+        pass
+    return rss
+
+
+def percentiles(samples: List[float]) -> Dict[Text, float]:
+    ordered = sorted(samples)
+    return {
+        "p50_ms": round(statistics.median(ordered), 2),
+        "p95_ms": round(ordered[int(0.95 * (len(ordered) - 1))], 2),
+    }
+
+
+async def evaluate(model: Text, test_dir: Text) -> Dict[Text, Any]:
+    """Runs in the evaluation subprocess; prints its result as JSON."""
+    from rasa.core.agent import load_agent
+    from rasa.core.test import test as test_core
+    from rasa.shared.core.events import UserUttered
+
+    agent = await load_agent(model_path=model)
+    with open(os.path.join(test_dir, "test_messages.json"), encoding="utf-8") as f:
+        messages = json.load(f)
+
+    # Build the TensorFlow graphs before timing anything.
+    await agent.parse_message("hello")
+    parse_ms, correct = [], 0
+    for intent, text in messages:
+        started = time.perf_counter()
+        parsed = await agent.parse_message(text)
+        parse_ms.append((time.perf_counter() - started) * 1000)
+        correct += parsed["intent"]["name"] == intent
+
+    predict_ms = []
+    sender_id = "training-bench"
+    for _, text in messages[:50]:
+        parsed = await agent.parse_message(text)
+        tracker = await agent.processor.get_tracker(sender_id)
+        tracker.update(UserUttered(text, parsed["intent"], parsed["entities"], parsed))
+        await agent.tracker_store.save(tracker)
+        started = time.perf_counter()
+        await agent.predict_next_for_sender_id(sender_id)
+        predict_ms.append((time.perf_counter() - started) * 1000)
+
+    core = await test_core(
+        os.path.join(test_dir, "test_stories.yml"),
+        agent,
+        out_directory=os.path.join(test_dir, "core_results"),
+        disable_plotting=True,
+        errors=False,
+        warnings=False,
+    )
+    return {
+        "intent_accuracy": round(correct / len(messages), 4) if messages else None,
+        "core_accuracy": round(core.get("accuracy", 0.0), 4),
+        "parse": percentiles(parse_ms),
+        "predict": percentiles(predict_ms) if predict_ms else None,
+    }
+
+
+def train_and_evaluate(
+    scale_dir: Text, test_dir: Text, variant: Text, base_config: Dict[Text, Any]
+) -> Dict[Text, Any]:
+    config = copy.deepcopy(base_config)
+    VARIANTS[variant](config)
+    config_path = os.path.join(scale_dir, f"config_{variant}.yml")
+    write_yaml(config_path, config)
+
+    result: Dict[Text, Any] = {}
+    code, train_s, train_rss, _ = run_measured(
+        [sys.executable, "-m", "rasa", "train", "--config", config_path, "--domain", "domain.yml",
+         "--data", "data", "--out", "models", "--fixed-model-name", variant],
+        cwd=scale_dir,
+    )
+    model = os.path.join(scale_dir, "models", f"{variant}.tar.gz")
+    if code != 0 or not os.path.exists(model):
+        result["error"] = f"rasa train exited with {code}"
+        return result
+    result.update(
+        train_s=round(train_s, 1),
+        train_peak_rss_mb=round(train_rss, 1),
+        model_mb=round(os.path.getsize(model) / 2 ** 20, 2),
+    )
+
+    code, _, eval_rss, stdout = run_measured(
+        [sys.executable, "-m", "benchmarks.training_bench", "--evaluate-model", model, "--test-dir", test_dir],
+        cwd=PROJECT_ROOT,
+    )
+    if code != 0:
+        result["error"] = f"evaluation exited with {code}"
+        return result
+    result.update(json.loads(stdout.strip().splitlines()[-1]))
+    result["eval_peak_rss_mb"] = round(eval_rss, 1)
+    return result
+
+
+def main(args: argparse.Namespace) -> List[Dict[Text, Any]]:
+    rng = random.Random(args.seed)
+    base_config = load_yaml(os.path.join(PROJECT_ROOT, "config.yml"))
+    examples = ConversationGenerator().examples
+    train_examples, test_messages = split_examples(examples, args.test_fraction, rng)
+
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix="training-bench-")
+    test_dir = os.path.join(work_dir, "test")
+    os.makedirs(test_dir, exist_ok=True)
+    build_test_set(test_dir, test_messages, args)
+
+    results = []
+    for scale in args.scales:
+        scale_dir = os.path.join(work_dir, f"scale_{scale}")
+        sizes = build_project(scale_dir, scale, train_examples, args)
+        for variant in args.variants:
+            result: Dict[Text, Any] = {"scale": scale, "variant": variant}
+            result.update(sizes)
+            result.update(train_and_evaluate(scale_dir, test_dir, variant, base_config))
+            results.append(result)
+            print(json.dumps(result))
+    if not args.work_dir:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return results
+
+
+def create_argument_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Training data growth and config variant benchmark")
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 2, 4],
+                        help="Multiples of the project's NLU examples and stories to train on")
+    parser.add_argument("--variants", nargs="+", choices=sorted(VARIANTS), default=["baseline"])
+    parser.add_argument("--test-fraction", type=float, default=0.2,
+                        help="Share of each intent's examples held out for the intent accuracy")
+    parser.add_argument("--test-stories", type=int, default=50)
+    parser.add_argument("--max-fragments", type=int, default=4, help="Story fragments per stitched story")
+    parser.add_argument("--work-dir", help="Keep the generated projects and models here")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--report", help="Write the results as JSON to this path")
+    parser.add_argument("--evaluate-model", help=argparse.SUPPRESS)
+    parser.add_argument("--test-dir", help=argparse.SUPPRESS)
+    return parser
+
+
+if __name__ == "__main__":
+    cli_args = create_argument_parser().parse_args()
+    if cli_args.evaluate_model:
+        print(json.dumps(asyncio.run(evaluate(cli_args.evaluate_model, cli_args.test_dir))))
+        sys.exit(0)
+    report = main(cli_args)
+    if cli_args.report:
+        with open(cli_args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
@@ -0,0 +1,13 @@
+"""Extensions for the rasa_sdk action server.
+
+rasa_sdk imports this package (when it is importable from the directory the
+action server is started in) and calls `init_hooks` to register plugins.
+"""
+
+import pluggy
+
+from rasa_sdk_plugins import action_server
+
+
+def init_hooks(manager: pluggy.PluginManager) -> None:
+    manager.register(action_server)
@@ -0,0 +1,161 @@
+import hmac
+import json
+import logging
+import os
+import time
+
+import pluggy
+from sanic import Sanic, response
+from sanic.request import Request
+from sanic.response import HTTPResponse
+
+from actions.actions import warm_up
+from actions.bulk_check import BACKEND_ERRORS, check_phone_numbers, decode_lines, load_directory, read_phone_numbers
+from actions.metrics import ACTION_ERRORS, ACTION_LATENCY, ACTIONS_IN_FLIGHT, REGISTRY
+from actions.packages import catalogue
+from actions.tracing import end_span, start_span, valid_trace_id
+
+logger = logging.getLogger(__name__)
+
+hookimpl = pluggy.HookimplMarker("rasa_sdk")
+
+# Set ACTION_WARM_UP=false to skip filling the caches at start-up.
+WARM_UP = os.environ.get("ACTION_WARM_UP", "true").lower() not in ("0", "false", "no")
+# Upper bound on the `concurrency` a /bulk/check caller can ask for.
+BULK_CHECK_MAX_CONCURRENCY = int(os.environ.get("ACTION_BULK_CHECK_MAX_CONCURRENCY", "50"))
+# Bearer token /bulk/check callers must send; the endpoint is disabled without one.
+BULK_CHECK_TOKEN = os.environ.get("ACTION_BULK_CHECK_TOKEN", "")
+
+
+async def _body_chunks(request: Request):
+    while True:
+        chunk = await request.stream.read()
+        if chunk is None:
+            return
+        yield chunk
+
+
+def _bulk_check_authorized(request: Request) -> bool:
+    scheme, _, token = (request.headers.get("authorization") or "").partition(" ")
+    return scheme.lower() == "bearer" and hmac.compare_digest(token.strip().encode(), BULK_CHECK_TOKEN.encode())
+
+
+def _action_name(request: Request) -> str:
+    try:
+        return (request.json or {}).get("next_action") or "unknown"
+    except Exception:
+        return "unknown"
+
+
+def _trace_id(request: Request):
+    """The trace id the chat widget attached to the user message this action responds to."""
+    try:
+        metadata = ((request.json or {}).get("tracker") or {}).get("latest_message", {}).get("metadata") or {}
+        return valid_trace_id(metadata.get("trace_id"))
+    except Exception:
+        return None
+
+
+@hookimpl
+def attach_sanic_app_extensions(app: Sanic) -> None:
+    app.ctx.ready = not WARM_UP
+    app.ctx.warm_up_report = {}
+
+    async def run_warm_up() -> None:
+        started = time.perf_counter()
+        try:
+            app.ctx.warm_up_report = await warm_up()
+        finally:
+            app.ctx.ready = True
+        logger.info(
+            "Action server warmed up in %.0fms: %s", (time.perf_counter() - started) * 1000, app.ctx.warm_up_report
+        )
+
+    @app.listener("after_server_start")
+    async def start_warm_up(app: Sanic, _loop) -> None:
+        if WARM_UP:
+            app.add_task(run_warm_up())
+
+    @app.middleware("request")
+    async def start_action_timer(request: Request) -> None:
+        if request.path != "/webhook":
+            return
+        request.ctx.action = _action_name(request)
+        request.ctx.started = time.perf_counter()
+        request.ctx.span = start_span(
+            f"action:{request.ctx.action}", _trace_id(request), action=request.ctx.action
+        )
+        ACTIONS_IN_FLIGHT.inc(action=request.ctx.action)
+
+    @app.middleware("response")
+    async def observe_action(request: Request, http_response: HTTPResponse) -> None:
+        started = getattr(request.ctx, "started", None)
+        if started is None:
+            return
+        request.ctx.started = None
+        action = request.ctx.action
+        status = str(http_response.status)
+        ACTIONS_IN_FLIGHT.dec(action=action)
+        ACTION_LATENCY.observe(time.perf_counter() - started, action=action, status=status)
+        end_span(*request.ctx.span, status=status)
+        if http_response.status >= 400:
+            ACTION_ERRORS.inc(action=action, status=status)
+
+    @app.get("/metrics")
+    async def metrics(_: Request) -> HTTPResponse:
+        return response.text(REGISTRY.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+    @app.get("/packages")
+    async def packages(request: Request) -> HTTPResponse:
+        """The package catalogue for the chat widget's carousel, with the version as ETag.
+
+        The carousel attachment links to `/packages?v=<version>`; that URL never
+        changes content, so browsers may cache it for good.
+        """
+        version, body = catalogue.current()
+        headers = {
+            "ETag": f'"{version}"',
+            "Cache-Control": "public, max-age=31536000, immutable" if request.args.get("v") == version else "no-cache",
+        }
+        if request.headers.get("if-none-match") == headers["ETag"]:
+            return response.empty(status=304, headers=headers)
+        return response.raw(body, content_type="application/json", headers=headers)
+
+    @app.get("/ready")
+    async def ready(_: Request) -> HTTPResponse:
+        """Readiness probe: 503 until the start-up warm-up has finished."""
+        body = {"ready": app.ctx.ready, "warm_up": app.ctx.warm_up_report}
+        return response.json(body, status=200 if app.ctx.ready else 503)
+
+    @app.post("/bulk/check", stream=True)
+    async def bulk_check(request: Request):
+        """Credit balance checks for a JSONL or CSV body of phone numbers (see actions.bulk_check).
+
+        Query parameters: `call_history=true` and `concurrency`. The results are
+        streamed back as JSONL while the body is still being read. Callers must
+        send `Authorization: Bearer <ACTION_BULK_CHECK_TOKEN>`; without a token
+        configured the endpoint answers 404.
+        """
+        if not BULK_CHECK_TOKEN:
+            return response.json({"error": "Not found"}, status=404)
+        if not _bulk_check_authorized(request):
+            return response.json({"error": "Unauthorized"}, status=401, headers={"WWW-Authenticate": "Bearer"})
+
+        input_format = "csv" if "csv" in (request.content_type or "") else "jsonl"
+        call_history = request.args.get("call_history", "").lower() in ("1", "true", "yes")
+        try:
+            concurrency = min(max(1, int(request.args.get("concurrency", 20))), BULK_CHECK_MAX_CONCURRENCY)
+        except ValueError:
+            return response.json({"error": "concurrency must be an integer"}, status=400)
+
+        try:
+            await load_directory()
+        except BACKEND_ERRORS as e:
+            logger.error("Bulk check could not load the customer list: %s", e)
+            return response.json({"error": "Customer list unavailable"}, status=503)
+
+        phone_numbers = read_phone_numbers(decode_lines(_body_chunks(request)), input_format)
+        stream = await request.respond(content_type="application/x-ndjson")
+        async for result in check_phone_numbers(phone_numbers, call_history, concurrency):
+            await stream.send(json.dumps(result) + "\n")
+        await stream.eof()
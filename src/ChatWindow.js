@@ -1,8 +1,31 @@
 import React, { useState, useEffect, useRef } from 'react';
+import { io } from 'socket.io-client';
 import botLogo from './images/bot.png';
 import userLogo from './images/user.png';
 import headerLogo from './images/MM logo.png'; // New header logo (replace with your file)
 
+const RASA_URL = process.env.REACT_APP_RASA_URL || 'http://localhost:5005';
+
+// One conversation (and Rasa tracker) per browser tab, kept across reloads.
+function getSessionId() {
+  let id = sessionStorage.getItem('rasa_session_id');
+  if (!id) {
+    id = window.crypto?.randomUUID
+      ? window.crypto.randomUUID()
+      : `${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}`;
+    sessionStorage.setItem('rasa_session_id', id);
+  }
+  return id;
+}
+
+// A new trace id per user message; the Rasa and action servers record their
+// spans for the turn under it (see actions/tracing.py).
+function newTraceId() {
+  const bytes = new Uint8Array(16);
+  window.crypto.getRandomValues(bytes);
+  return Array.from(bytes, (b) => b.toString(16).padStart(2, '0')).join('');
+}
+
 export default function ChatWindow() {
   const [messages, setMessages] = useState([
     { sender: 'bot', text: 'You’re chatting with Voxi, your virtual assistant.', timestamp: new Date() }
@@ -10,7 +33,57 @@ export default function ChatWindow() {
   const [input, setInput] = useState('');
   const [isMinimized, setIsMinimized] = useState(false);
   const [carouselIndexes, setCarouselIndexes] = useState({}); // Track carousel index per message
+  // Package catalogues by version. A carousel that only links to its packages
+  // shares the one download of that version with every other carousel.
+  const [catalogues, setCatalogues] = useState({});
+  const catalogueRequests = useRef({});
   const bottomRef = useRef(null);
+  const socketRef = useRef(null);
+  const sessionId = useRef(getSessionId()).current;
+
+  // Bot replies are pushed over socket.io as each action finishes, instead of
+  // arriving all at once when the whole turn is done.
+  useEffect(() => {
+    const loadCatalogue = (attachment) => {
+      if (!attachment || attachment.type !== 'carousel' || attachment.packages || !attachment.url) return;
+      const { version, url } = attachment;
+      if (catalogueRequests.current[version]) return;
+      catalogueRequests.current[version] = fetch(url)
+        .then((res) => {
+          if (!res.ok) throw new Error(`GET ${url} returned ${res.status}`);
+          return res.json();
+        })
+        .then((body) => setCatalogues((prev) => ({ ...prev, [version]: body.packages })))
+        .catch((err) => {
+          delete catalogueRequests.current[version];
+          console.error('Error loading packages:', err);
+        });
+    };
+
+    const socket = io(RASA_URL);
+    socketRef.current = socket;
+
+    socket.on('connect', () => {
+      socket.emit('session_request', { session_id: sessionId });
+    });
+    socket.on('bot_uttered', (botReply) => {
+      loadCatalogue(botReply.attachment);
+      setMessages((msgs) => [
+        ...msgs,
+        {
+          sender: 'bot',
+          text: botReply.text,
+          attachment: botReply.attachment,
+          timestamp: new Date()
+        }
+      ]);
+    });
+    socket.on('connect_error', (err) => {
+      console.error('Error connecting to Rasa:', err);
+    });
+
+    return () => socket.disconnect();
+  }, [sessionId]);
 
   useEffect(() => {
     if (!isMinimized) {
@@ -18,34 +91,19 @@ export default function ChatWindow() {
     }
   }, [messages, isMinimized]);
 
-  const sendMessage = async () => {
+  const sendMessage = () => {
     if (!input.trim()) return;
-    const userMsg = { sender: 'user', text: input, timestamp: new Date() };
+    const traceId = newTraceId();
+    const userMsg = { sender: 'user', text: input, traceId, timestamp: new Date() };
     setMessages((msgs) => [...msgs, userMsg]);
     setInput('');
 
-    try {
-      const res = await fetch('http://localhost:5005/webhooks/rest/webhook', {
-        method: 'POST',
-        headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify({ sender: 'user', message: input }),
-      });
-      const data = await res.json();
-      data.forEach((botReply) => {
-        setMessages((msgs) => [
-          ...msgs,
-          {
-            sender: 'bot',
-            text: botReply.text,
-            attachment: botReply.attachment,
-            timestamp: new Date()
-          }
-        ]);
-      });
-    } catch (err) {
-      console.error('Error connecting to Rasa:', err);
+    const socket = socketRef.current;
+    if (!socket || !socket.connected) {
       setMessages((msgs) => [...msgs, { sender: 'bot', text: 'Sorry, connection error!', timestamp: new Date() }]);
+      return;
     }
+    socket.emit('user_uttered', { message: input, session_id: sessionId, metadata: { trace_id: traceId } });
   };
 
   const handleKey = (e) => {
@@ -58,7 +116,10 @@ export default function ChatWindow() {
 
   // Carousel rendering for single-card with arrows
   function renderCarousel(attachment, msgIdx) {
-    const packages = attachment.packages;
+    const packages = attachment.packages || catalogues[attachment.version];
+    if (!packages) {
+      return <div className="bubble bot">Loading packages…</div>;
+    }
     const currentIdx = carouselIndexes[msgIdx] || 0;
     const pkg = packages[currentIdx];
     const atFirst = currentIdx === 0;
@@ -122,7 +183,9 @@ export default function ChatWindow() {
                   {msg.attachment && msg.attachment.type === "carousel" ? (
                     renderCarousel(msg.attachment, i)
                   ) : (
-                    <div className={`bubble ${msg.sender}`}>{msg.text}</div>
+                    <div className={`bubble ${msg.sender}`} title={msg.traceId && `Trace ${msg.traceId}`}>
+                      {msg.text}
+                    </div>
                   )}
                   <div className="message-meta">
                     {msg.sender === 'bot' ? 'Bot' : 'You'} • {formatTimestamp(msg.timestamp)}
@@ -0,0 +1,84 @@
+import asyncio
+import time
+
+import fakeredis.aioredis
+import jwt
+
+from actions.auth import TokenManager
+from actions.cls_client import ClsResponse
+from actions.config import SharedCacheConfig
+from actions.shared_cache import SharedCache
+
+
+class SlowClsClient:
+    def __init__(self) -> None:
+        self.calls = 0
+
+    async def authenticate(self, username, password):
+        self.calls += 1
+        await asyncio.sleep(0.05)
+        return ClsResponse(200, {"token": "token"})
+
+
+class RevokingClsClient:
+    """Issues JWTs and answers 401 to requests made with a revoked one."""
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.revoked = set()
+        self.requests = []
+
+    async def authenticate(self, username, password):
+        self.calls += 1
+        return ClsResponse(200, {"token": jwt.encode({"exp": int(time.time()) + 3600, "n": self.calls}, "test-signing-key-of-at-least-32-bytes")})
+
+    async def get(self, token):
+        self.requests.append(token)
+        return ClsResponse(401 if token in self.revoked else 200, [])
+
+
+def shared_cache(server: fakeredis.FakeServer) -> SharedCache:
+    cache = SharedCache(SharedCacheConfig(url="redis://fake"))
+    cache._client = fakeredis.aioredis.FakeRedis(server=server)
+    return cache
+
+
+def test_cancelled_caller_does_not_cancel_the_others():
+    async def scenario():
+        client = SlowClsClient()
+        manager = TokenManager(client, "user", "secret")
+        callers = [asyncio.ensure_future(manager.get_token()) for _ in range(4)]
+        await asyncio.sleep(0.01)
+        callers[0].cancel()
+        results = await asyncio.gather(*callers, return_exceptions=True)
+        return client.calls, results
+
+    calls, results = asyncio.run(scenario())
+    assert calls == 1
+    assert isinstance(results[0], asyncio.CancelledError)
+    assert results[1:] == ["token"] * 3
+
+
+def test_rejected_token_is_not_adopted_from_the_shared_cache():
+    async def scenario():
+        client = RevokingClsClient()
+        server = fakeredis.FakeServer()
+        first = TokenManager(client, "user", "secret", shared=shared_cache(server))
+        second = TokenManager(client, "user", "secret", shared=shared_cache(server))
+
+        old = await first.get_token()
+        assert await second.get_token() == old
+        client.revoked.add(old)
+
+        first_response = await first.call(client.get)
+        second_response = await second.call(client.get)
+        return client, old, first_response, second_response
+
+    client, old, first_response, second_response = asyncio.run(scenario())
+    assert first_response.status == 200
+    assert second_response.status == 200
+    # One authentication for the first token and one to replace it, shared by both workers.
+    assert client.calls == 2
+    new = client.requests[1]
+    assert new != old
+    assert client.requests == [old, new, old, new]
@@ -0,0 +1,27 @@
+import asyncio
+import json
+
+from actions import bulk_check
+
+
+async def _numbers(*phone_numbers):
+    for phone_number in phone_numbers:
+        yield phone_number
+
+
+def test_malformed_backend_body_is_reported_per_number(monkeypatch):
+    async def lookup_phone(phone_number):
+        if phone_number == "0500000001":
+            raise json.JSONDecodeError("Expecting value", "<html>", 0)
+        return None
+
+    monkeypatch.setattr(bulk_check.customer_directory, "lookup_phone", lookup_phone)
+
+    async def scenario():
+        return [r async for r in bulk_check.check_phone_numbers(_numbers("0500000001", "0500000002"))]
+
+    first, second = asyncio.run(scenario())
+    assert first["phone_number"] == "0500000001"
+    assert first["status"] == "error"
+    assert first["error"].startswith("JSONDecodeError: Expecting value")
+    assert second == {"phone_number": "0500000002", "status": "not_found"}
@@ -0,0 +1,106 @@
+import asyncio
+
+import pytest
+from rasa_sdk import Tracker
+from rasa_sdk.events import FollowupAction
+from rasa_sdk.executor import CollectingDispatcher
+
+from actions import actions
+from actions.call_history import CallHistory, CallHistoryCache
+from actions.cls_client import CircuitOpenError
+from actions.customer_directory import CustomerRecord
+from actions.templates import templates
+
+CUSTOMER = CustomerRecord("C1", "0500000001", 0.0)
+HISTORY = CallHistory(200, [{"number": "0511111111", "callDate": "2024-01-01", "duration": 30, "callType": "out"}])
+
+
+class Stage:
+    """A stand-in for one backend stage: returns or raises after `delay`, and records a cancellation."""
+
+    def __init__(self, result=None, error=None, delay=0.0) -> None:
+        self.result, self.error, self.delay = result, error, delay
+        self.cancelled = False
+
+    async def __call__(self, *args):
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+@pytest.fixture
+def stages(monkeypatch):
+    def install(verify, fetch, timeout=1.0):
+        monkeypatch.setattr(actions, "verify_customer", verify)
+        monkeypatch.setattr(actions, "load_call_history", fetch)
+        monkeypatch.setattr(actions, "CALL_HISTORY_TIMEOUT", timeout)
+        monkeypatch.setattr(actions, "call_history_cache", CallHistoryCache())
+        return verify, fetch
+
+    return install
+
+
+def show_call_history():
+    tracker = Tracker("test", {"phone_number": CUSTOMER.phone, "customer_id": CUSTOMER.id}, {}, [], False, None, {}, None)
+    dispatcher = CollectingDispatcher()
+
+    async def scenario():
+        events = await actions.ActionShowCallHistory().run(dispatcher, tracker, {})
+        # Let the cancelled stages run their cancellation.
+        await asyncio.sleep(0.01)
+        return events
+
+    events = asyncio.run(scenario())
+    return events, [m["text"] for m in dispatcher.messages]
+
+
+def test_shows_the_history_once_both_stages_pass(stages):
+    stages(Stage(CUSTOMER), Stage((HISTORY, True)))
+    events, messages = show_call_history()
+    assert events == []
+    assert messages == [actions.call_history_reply(HISTORY)]
+
+
+def test_timeout_cancels_both_stages(stages):
+    verify, fetch = stages(Stage(CUSTOMER, delay=10), Stage((HISTORY, True), delay=10), timeout=0.05)
+    events, messages = show_call_history()
+    assert messages == [templates.render("utter_call_history_service_error")]
+    assert verify.cancelled and fetch.cancelled
+
+
+def test_failed_verification_cancels_the_fetch(stages):
+    verify, fetch = stages(Stage(error=actions.CustomerMismatchError()), Stage((HISTORY, False), delay=10))
+    events, messages = show_call_history()
+    assert messages == [templates.render("utter_customer_mismatch")]
+    assert fetch.cancelled and not verify.cancelled
+
+
+def test_failed_fetch_cancels_the_verification(stages):
+    verify, fetch = stages(Stage(CUSTOMER, delay=10), Stage(error=actions.CallHistoryFetchError(500)))
+    events, messages = show_call_history()
+    assert messages == [templates.render("utter_call_history_error")]
+    assert verify.cancelled and not fetch.cancelled
+
+
+def test_open_circuit_serves_the_stale_cached_history(stages, monkeypatch):
+    stages(Stage(error=CircuitOpenError("open")), Stage(error=CircuitOpenError("open")))
+    # Every entry is past its TTL, so only get_stale returns it.
+    monkeypatch.setattr(actions, "call_history_cache", CallHistoryCache(ttl=-1.0))
+    actions.call_history_cache.put(CUSTOMER.id, HISTORY)
+    assert actions.call_history_cache.get(CUSTOMER.id) is None
+
+    events, messages = show_call_history()
+    assert events == []
+    assert messages == [actions.call_history_reply(HISTORY)]
+
+
+def test_open_circuit_without_a_cached_history_hands_over(stages):
+    stages(Stage(error=CircuitOpenError("open")), Stage(error=CircuitOpenError("open")))
+    events, messages = show_call_history()
+    assert events == [FollowupAction("action_connect_to_representative")]
+    assert messages == [templates.render("utter_backend_unavailable")]
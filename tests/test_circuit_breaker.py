@@ -0,0 +1,133 @@
+import asyncio
+
+import pytest
+from rasa_sdk import Tracker
+from rasa_sdk.events import FollowupAction, SlotSet
+from rasa_sdk.executor import CollectingDispatcher
+
+from actions import actions, circuit_breaker
+from actions.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+from actions.cls_client import CircuitOpenError
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(circuit_breaker, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def open_breaker(monkeypatch):
+    """The CLS client's breaker, opened; no cached or shared CLS token."""
+    breaker = CircuitBreaker("cls_api", failure_threshold=1, reset_timeout=60.0)
+    breaker.record_failure()
+    monkeypatch.setattr(actions.cls_client, "breaker", breaker)
+    monkeypatch.setattr(actions.token_manager, "_token", None)
+    monkeypatch.setattr(actions.token_manager, "shared", None)
+    return breaker
+
+
+def tracker(**slots):
+    return Tracker("test", slots, {}, [], False, None, {}, None)
+
+
+def test_opens_after_consecutive_failures_only(clock):
+    breaker = CircuitBreaker("test", failure_threshold=3, reset_timeout=30.0)
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CLOSED and breaker.allow()
+
+    breaker.record_failure()
+    assert breaker.state == OPEN and breaker.is_open
+    assert not breaker.allow()
+
+
+def test_half_open_lets_one_trial_through_and_closes_on_success(clock):
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=30.0)
+    breaker.record_failure()
+    clock.now += 29.9
+    assert not breaker.allow()
+
+    clock.now += 0.1
+    assert breaker.state == HALF_OPEN and not breaker.is_open
+    assert breaker.allow()
+    assert not breaker.allow()
+
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    assert breaker.failures == 0
+    assert breaker.allow() and breaker.allow()
+
+
+def test_failed_trial_reopens_for_a_full_reset_timeout(clock):
+    breaker = CircuitBreaker("test", failure_threshold=5, reset_timeout=30.0)
+    for _ in range(5):
+        breaker.record_failure()
+    clock.now += 30.0
+    assert breaker.allow()
+
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    clock.now += 29.9
+    assert not breaker.allow()
+    clock.now += 0.1
+    assert breaker.allow()
+
+
+def test_trial_that_never_reports_back_does_not_block_the_next(clock):
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=30.0)
+    breaker.record_failure()
+    clock.now += 30.0
+    assert breaker.allow()
+    clock.now += 29.9
+    assert not breaker.allow()
+    clock.now += 0.1
+    assert breaker.allow()
+
+
+def test_open_breaker_fails_fast_without_calling_the_api(open_breaker):
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(actions.cls_client.request("GET", "getAllCustomers", auth_token="token"))
+
+
+def test_phone_form_ends_and_flags_the_backend_as_unavailable(open_breaker):
+    dispatcher = CollectingDispatcher()
+    result = asyncio.run(
+        actions.ValidatePhoneNumberForm().validate_phone_number("0500000001", dispatcher, tracker(), {})
+    )
+    assert result == {"phone_number": None, "requested_slot": None, "backend_unavailable": True}
+    assert [m["text"] for m in dispatcher.messages] == [actions.templates.render("utter_backend_unavailable")]
+
+
+@pytest.mark.parametrize("backend_unavailable, breaker_open", [(True, False), (None, True)])
+def test_credit_check_hands_over_to_a_representative(monkeypatch, backend_unavailable, breaker_open):
+    breaker = CircuitBreaker("cls_api", failure_threshold=1)
+    if breaker_open:
+        breaker.record_failure()
+    monkeypatch.setattr(actions.cls_client, "breaker", breaker)
+    dispatcher = CollectingDispatcher()
+    events = asyncio.run(
+        actions.ActionCheckCreditBalance().run(dispatcher, tracker(backend_unavailable=backend_unavailable), {})
+    )
+    assert events == [SlotSet("backend_unavailable", None), FollowupAction("action_connect_to_representative")]
+    assert dispatcher.messages == []
+
+
+def test_credit_check_replies_normally_when_the_backend_is_up(monkeypatch):
+    monkeypatch.setattr(actions.cls_client, "breaker", CircuitBreaker("cls_api"))
+    dispatcher = CollectingDispatcher()
+    events = asyncio.run(actions.ActionCheckCreditBalance().run(dispatcher, tracker(credit_balance=0.0), {}))
+    assert events == [SlotSet("credit_balance", 0.0), SlotSet("current_question", "show_call_history")]
+    assert len(dispatcher.messages) == 1
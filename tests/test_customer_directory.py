@@ -0,0 +1,86 @@
+import asyncio
+
+from actions.customer_directory import CustomerDirectory
+
+
+class Backend:
+    def __init__(self, count: int) -> None:
+        self.customers = [{"id": i, "phone": f"05{i:08d}", "creditLimit": i} for i in range(count)]
+        self.fetches = 0
+
+    async def fetch(self):
+        self.fetches += 1
+        return list(self.customers)
+
+
+def test_customers_past_the_cap_are_found_without_refetching():
+    async def scenario():
+        backend = Backend(10)
+        directory = CustomerDirectory(backend.fetch, max_entries=4, overflow_entries=2)
+
+        indexed = await directory.lookup_phone("0500000001")
+        past_cap = await directory.lookup_phone("0500000007")
+        by_id = await directory.lookup_id(8)
+        missing = [await directory.lookup_phone("0599999999") for _ in range(3)]
+        return backend, directory, indexed, past_cap, by_id, missing
+
+    backend, directory, indexed, past_cap, by_id, missing = asyncio.run(scenario())
+    assert directory.truncated
+    assert len(directory) == 4
+    assert indexed.id == 1
+    assert past_cap.id == 7
+    assert by_id.phone == "0500000008"
+    assert missing == [None] * 3
+    # Misses within miss_refresh_interval scan the list from the first load.
+    assert backend.fetches == 1
+
+
+def test_overflow_lru_keeps_the_most_recently_used_records():
+    async def scenario():
+        backend = Backend(10)
+        directory = CustomerDirectory(backend.fetch, max_entries=4, overflow_entries=2)
+        for phone in ("0500000005", "0500000006", "0500000005", "0500000007"):
+            await directory.lookup_phone(phone)
+        scans = directory.overflow_scans
+        assert (await directory.lookup_phone("0500000005")).id == 5
+        assert (await directory.lookup_id(7)).id == 7
+        assert directory.overflow_scans == scans
+        assert (await directory.lookup_phone("0500000006")).id == 6
+        assert directory.overflow_scans == scans + 1
+        return directory
+
+    directory = asyncio.run(scenario())
+    # Two records, each kept under its phone and its id.
+    assert directory.stats()["overflow_size"] == 4
+
+
+def test_truncated_miss_refetches_once_per_miss_refresh_interval():
+    async def scenario():
+        backend = Backend(6)
+        directory = CustomerDirectory(backend.fetch, max_entries=4, miss_refresh_interval=30.0)
+        assert await directory.lookup_phone("0500000006") is None
+
+        backend.customers.append({"id": 6, "phone": "0500000006", "creditLimit": 6})
+        assert await directory.lookup_phone("0500000006") is None
+        assert backend.fetches == 1
+
+        directory._loaded_at -= 31.0
+        record = await directory.lookup_phone("0500000006")
+        assert await directory.lookup_phone("0500000006") == record
+        return backend, record
+
+    backend, record = asyncio.run(scenario())
+    assert record.id == 6
+    assert backend.fetches == 2
+
+
+def test_untruncated_directory_does_not_scan():
+    async def scenario():
+        backend = Backend(3)
+        directory = CustomerDirectory(backend.fetch, max_entries=4)
+        assert await directory.lookup_phone("0599999999") is None
+        return directory
+
+    directory = asyncio.run(scenario())
+    assert not directory.truncated
+    assert directory.overflow_scans == 0
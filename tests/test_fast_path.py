@@ -0,0 +1,29 @@
+import pytest
+
+pytest.importorskip("rasa")
+
+from rasa.shared.nlu.constants import ENTITIES, INTENT, TEXT  # noqa: E402
+from rasa.shared.nlu.training_data.message import Message  # noqa: E402
+
+from addons.fast_path import FastPathClassifier  # noqa: E402
+
+
+def classify(text):
+    message = Message({TEXT: text})
+    rule = FastPathClassifier(FastPathClassifier.get_default_config()).classify(message)
+    return rule, message
+
+
+@pytest.mark.parametrize("text", ["0512345678", "  0512345678\n", " package b! ", "\tB"])
+def test_entity_offsets_point_into_the_original_text(text):
+    rule, message = classify(text)
+    assert rule is not None
+    (entity,) = message.get(ENTITIES)
+    assert text[entity["start"]:entity["end"]].upper() == entity["value"]
+
+
+@pytest.mark.parametrize("text", ["", "   ", "call 0512345678", "yes but", "package d"])
+def test_other_messages_are_left_to_the_pipeline(text):
+    rule, message = classify(text)
+    assert rule is None
+    assert message.get(INTENT) is None
@@ -0,0 +1,71 @@
+import asyncio
+import json
+
+import pytest
+
+from actions.json_stream import read_array_prefix
+
+BODY = json.dumps(
+    [{"number": "0500000001", "note": "say \"hi\"\\ é€📞"}, 45.5, "a,b]", [1, [2]], None, True],
+    ensure_ascii=False,
+).encode("utf-8")
+
+
+class Chunks:
+    """An async byte stream that records how many chunks were read."""
+
+    def __init__(self, *chunks: bytes) -> None:
+        self.chunks = list(chunks)
+        self.read = 0
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> bytes:
+        if self.read == len(self.chunks):
+            raise StopAsyncIteration
+        self.read += 1
+        return self.chunks[self.read - 1]
+
+
+def read(chunks, limit=None):
+    return asyncio.run(read_array_prefix(chunks, limit))
+
+
+@pytest.mark.parametrize("split", range(1, len(BODY)))
+def test_any_chunk_boundary_decodes_the_same(split):
+    assert read(Chunks(BODY[:split], BODY[split:])) == json.loads(BODY)
+
+
+def test_one_byte_chunks_decode_the_same():
+    assert read(Chunks(*[BODY[i:i + 1] for i in range(len(BODY))])) == json.loads(BODY)
+
+
+@pytest.mark.parametrize("split", range(1, len(BODY)))
+def test_limit_returns_the_first_items(split):
+    assert read(Chunks(BODY[:split], BODY[split:]), limit=3) == json.loads(BODY)[:3]
+
+
+def test_limit_stops_reading_the_stream():
+    chunks = Chunks(b'[{"id": 1},', b' {"id": 2},', b' {"id": 3},', b" {")
+    assert read(chunks, limit=2) == [{"id": 1}, {"id": 2}]
+    assert chunks.read == 2
+
+
+def test_limit_zero_and_empty_array():
+    assert read(Chunks(b"[1, 2]"), limit=0) == []
+    assert read(Chunks(b" [ ", b"] "), limit=5) == []
+
+
+def test_non_array_body_is_decoded_in_full():
+    assert read(Chunks(b'{"error": ', b'"down"}'), limit=1) == {"error": "down"}
+    assert read(Chunks()) is None
+
+
+@pytest.mark.parametrize(
+    "body",
+    [b"[1, 2", b'[{"id": 1}, {"id"', b'["unterminated', b"[1 2]", b"[1,]", b"[,1]", b"[1, tru]", b'{"a": 1'],
+)
+def test_malformed_or_truncated_input_raises(body):
+    with pytest.raises(ValueError):
+        read(Chunks(body[:3], body[3:]))
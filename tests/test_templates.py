@@ -0,0 +1,32 @@
+import pytest
+
+from actions.templates import TemplateLibrary
+
+LIBRARY = TemplateLibrary({
+    "utter_credit_balance": [
+        {"text": "Your credit is SAR {credit}."},
+        {"text": "{name}, your credit is SAR {credit}."},
+    ],
+    "utter_call_history_line": [
+        {"text": "- Call to {number} ({duration:>3} s)"},
+    ],
+    "utter_braces": [{"text": "{{literal}} {name}"}],
+})
+
+
+def test_render_uses_the_variation_with_the_most_filled_placeholders():
+    assert LIBRARY.render("utter_credit_balance", name="Ali", credit="1.00") == "Ali, your credit is SAR 1.00."
+    assert LIBRARY.render("utter_credit_balance", name=None, credit="1.00") == "Your credit is SAR 1.00."
+    assert LIBRARY.render("utter_credit_balance", name="", credit="1.00") == "Your credit is SAR 1.00."
+    assert LIBRARY.render("utter_braces", name="Ali") == "{literal} Ali"
+
+
+def test_render_without_a_matching_variation_raises():
+    with pytest.raises(ValueError, match="utter_credit_balance"):
+        LIBRARY.render("utter_credit_balance", name="Ali")
+
+
+def test_render_lines_fills_absent_keys_with_the_default():
+    rows = [{"number": "0500", "duration": 7}, {"number": "0501"}]
+    assert LIBRARY.render_lines("utter_call_history_line", rows) == "- Call to 0500 (  7 s)\n- Call to 0501 (N/A s)"
+    assert LIBRARY.render_lines("utter_call_history_line", [{}], default="?") == "- Call to ? (  ? s)"